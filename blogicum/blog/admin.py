@@ -1,6 +1,26 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count
 
-from .models import Category, Location, Post
+from .models import Category, Comment, Follow, Location, Post, Task
+from .registry import categories
+from .search import get_backend, parse_terms
+from .tasks import backfill_timeline, enqueue, enqueue_post_tasks
+from .timeline import drop
+
+
+class CategoryListFilter(admin.SimpleListFilter):
+    title = 'категория'
+    parameter_name = 'category'
+
+    def lookups(self, request, model_admin):
+        return [(category.id, category.title)
+                for category in categories.all()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(category_id=self.value())
+        return queryset
 
 
 @admin.register(Post)
@@ -17,10 +37,24 @@ class PostAdmin(admin.ModelAdmin):
         'category'
     )
     search_fields = ('title',)
-    list_filter = ('category',)
+    list_filter = (CategoryListFilter,)
     list_display_links = ('title',)
     ordering = ('-pub_date',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        enqueue_post_tasks(obj, form.changed_data)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Заголовок и текст ищутся по полнотекстовому индексу
+        # вместо LIKE '%...%' по всей таблице.
+        backend = get_backend()
+        terms = parse_terms(search_term)
+        if backend is None or not terms:
+            return super().get_search_results(
+                request, queryset, search_term)
+        return backend.filter_posts(queryset, terms), False
+
 
 class PostInline(admin.StackedInline):
     model = Post
@@ -33,3 +67,69 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Location)
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('text', 'post', 'author', 'created_at')
+    list_select_related = ('post', 'author')
+    raw_id_fields = ('post', 'author')
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if not change:
+                Post.change_comment_count(obj.post_id, 1)
+            elif 'post' in form.changed_data:
+                Post.change_comment_count(form.initial['post'], -1)
+                Post.change_comment_count(obj.post_id, 1)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            Post.change_comment_count(obj.post_id, -1)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            deleted = list(
+                queryset.order_by().values('post').annotate(total=Count('pk'))
+            )
+            super().delete_queryset(request, queryset)
+            for row in deleted:
+                Post.change_comment_count(row['post'], -row['total'])
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_after', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('last_error',)
+
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('user', 'author', 'created_at')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+
+    # Домашние ленты меняются так же, как при подписке на сайте.
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                drop(form.initial['user'], form.initial['author'])
+            super().save_model(request, obj, form, change)
+            enqueue(backfill_timeline,
+                    user_id=obj.user_id, author_id=obj.author_id)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            drop(obj.user_id, obj.author_id)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            pairs = list(queryset.values_list('user_id', 'author_id'))
+            super().delete_queryset(request, queryset)
+            for user_id, author_id in pairs:
+                drop(user_id, author_id)
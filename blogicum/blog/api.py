@@ -0,0 +1,320 @@
+import hashlib
+import time
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone as tz
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import quote_etag
+from django.views import View
+
+from .cache import (cache_page, current_tag_versions, get_cached_page,
+                    get_profile, page_key, page_response)
+from .mixins import ReplicaReadMixin
+from .models import Comment, Post
+from .pagination import CursorPaginator, InvalidCursor
+from .registry import categories
+from .scheduler import cache_timeout
+from .thumbnails import srcsets
+
+MAX_PAGE_SIZE = 50
+
+# Столбцы, по которым ответ списка помечается тегами кэша.
+TAG_COLUMNS = ('id', 'author_id', 'category_id', 'location_id')
+
+IMAGE_STORAGE = Post._meta.get_field('image').storage
+
+
+class ApiError(Exception):
+    """Ошибка в параметрах запроса; отдаётся с кодом 400."""
+
+
+def column(name):
+    return (name,), itemgetter(name)
+
+
+def category_slug(row):
+    category = categories.by_id(row['category_id'])
+    return category.slug if category else None
+
+
+def location_name(row):
+    if not row['location__is_published']:
+        return None
+    return row['location__name']
+
+
+def image_url(row):
+    return IMAGE_STORAGE.url(row['image']) if row['image'] else None
+
+
+def thumbnails(row):
+    data = row['thumbnail_data']
+    if not row['image'] or data.get('source') != row['image']:
+        return None
+    return srcsets(row['image'], data['widths'], IMAGE_STORAGE)
+
+
+# Поле ответа: столбцы для values() и функция, собирающая значение
+# из строки. Объекты моделей не создаются.
+POST_FIELDS = {
+    'id': column('id'),
+    'title': column('title'),
+    'text': column('text'),
+    'pub_date': column('pub_date'),
+    'updated_at': column('updated_at'),
+    'author': (('author__username',), itemgetter('author__username')),
+    'category': (('category_id',), category_slug),
+    'location': (('location__name', 'location__is_published'),
+                 location_name),
+    'image': (('image',), image_url),
+    'thumbnails': (('image', 'thumbnail_data'), thumbnails),
+    'comment_count': column('comment_count'),
+    'reaction_count': column('reaction_count'),
+}
+
+# Полный текст в списках отдаётся только по ?fields=...,text.
+POST_LIST_FIELDS = tuple(name for name in POST_FIELDS if name != 'text')
+
+COMMENT_FIELDS = {
+    'id': column('id'),
+    'author': (('author__username',), itemgetter('author__username')),
+    'text': column('text'),
+    'created_at': column('created_at'),
+}
+
+
+def parse_fields(value, available, default):
+    """Поля из параметра ?fields=a,b; без него — поля по умолчанию."""
+    if not value:
+        return list(default)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}.')
+    return names
+
+
+def columns(names, available, ordering=()):
+    """Столбцы values() для полей `names` и полей сортировки."""
+    result = [name.lstrip('-') for name in ordering]
+    for name in names:
+        result += available[name][0]
+    return list(dict.fromkeys(result))
+
+
+def serialize(rows, names, available):
+    getters = [(name, available[name][1]) for name in names]
+    return [{name: get(row) for name, get in getters} for row in rows]
+
+
+class ApiView(ReplicaReadMixin, View):
+    """JSON только для чтения с ETag и ответом 304 на повторный запрос.
+
+    Ответы, не зависящие от пользователя, кэшируются под тегами,
+    как страницы AnonymousPageCacheMixin: повторный запрос отдаётся из кэша,
+    а с совпадающим ETag получает 304 без запросов к базе.
+    """
+    http_method_names = ['get', 'head', 'options']
+    paginate_by = 10
+    page_cache_tags = ()
+    # Ответ зависит от пользователя: его видят только вошедшие
+    # или автору показываются черновики.
+    user_dependent = False
+
+    def get(self, request, *args, **kwargs):
+        # Теги строк ответа; их добавляет get_data().
+        self.data_tags = []
+        if self.user_dependent and request.user.is_authenticated:
+            # Ответ может включать черновики автора: в общий кэш
+            # он не попадает, ETag считается по готовому телу.
+            try:
+                return self.render(self.get_data())
+            except ApiError as error:
+                return self.error(error)
+        key = page_key(request)
+        entry = get_cached_page(key)
+        if entry is None:
+            # Версии читаются до выборки: сброс тега во время
+            # запроса делает запись сразу недействительной.
+            static_versions = current_tag_versions(
+                self.get_page_cache_tags())
+            try:
+                data = self.get_data()
+            except ApiError as error:
+                return self.error(error)
+            versions = current_tag_versions(sorted(set(self.data_tags)))
+            versions.update(static_versions)
+            entry = cache_page(
+                key, self.json(data), versions,
+                cache_timeout(settings.BLOG_PAGE_CACHE_TIMEOUT),
+                int(time.time()),
+            )
+        return get_conditional_response(
+            request,
+            etag=entry['etag'],
+            last_modified=entry['last_modified'],
+            response=page_response(entry),
+        )
+
+    def get_page_cache_tags(self):
+        return list(self.page_cache_tags)
+
+    def get_data(self):
+        raise ImproperlyConfigured(
+            f'{self.__class__.__name__} должен определить get_data().')
+
+    def get_page_size(self):
+        value = self.request.GET.get('limit')
+        if not value:
+            return self.paginate_by
+        try:
+            size = int(value)
+        except ValueError:
+            raise ApiError('Параметр limit должен быть числом.')
+        return min(max(size, 1), MAX_PAGE_SIZE)
+
+    def paginate(self, queryset, ordering):
+        paginator = CursorPaginator(queryset, self.get_page_size(), ordering)
+        try:
+            return paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor as error:
+            raise ApiError(str(error))
+
+    def json(self, data):
+        return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+
+    def error(self, error):
+        return JsonResponse({'detail': str(error)}, status=400)
+
+    def render(self, data):
+        response = self.json(data)
+        etag = quote_etag(hashlib.md5(response.content).hexdigest())
+        response['ETag'] = etag
+        # Ответ зависит от пользователя (черновики автора), поэтому
+        # клиент каждый раз сверяет ETag, а общий кэш учитывает Cookie.
+        patch_cache_control(response, private=True, max_age=0)
+        patch_vary_headers(response, ('Cookie',))
+        return get_conditional_response(
+            self.request, etag=etag, response=response)
+
+
+def post_cache_tags(row):
+    tags = [f'post:{row["id"]}', f'author:{row["author_id"]}',
+            f'category:{row["category_id"]}']
+    if row['location_id']:
+        tags.append(f'location:{row["location_id"]}')
+    return tags
+
+
+class PostListApiView(ApiView):
+    """Страница публикаций в порядке `cursor_ordering`.
+
+    Подклассы задают `queryset` или переопределяют get_queryset().
+    """
+    queryset = None
+    cursor_ordering = ('-pub_date', 'id')
+
+    def get_queryset(self):
+        if self.queryset is None:
+            raise ImproperlyConfigured(
+                f'{self.__class__.__name__} должен задать queryset '
+                'или переопределить get_queryset().')
+        return self.queryset.all()
+
+    def get_data(self):
+        names = parse_fields(
+            self.request.GET.get('fields'), POST_FIELDS, POST_LIST_FIELDS)
+        page = self.paginate(
+            self.get_queryset().values(*columns(
+                names, POST_FIELDS, self.cursor_ordering + TAG_COLUMNS)),
+            self.cursor_ordering,
+        )
+        for row in page:
+            self.data_tags += post_cache_tags(row)
+        return {
+            'posts': serialize(page, names, POST_FIELDS),
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        }
+
+
+class FeedApiView(PostListApiView):
+    # Порядок и курсор ленты IndexListView.
+    cursor_ordering = ('-pub_date', 'category_id', 'title', 'id')
+    page_cache_tags = ('feed',)
+
+    def get_queryset(self):
+        return Post.published_posts()
+
+
+class CategoryApiView(PostListApiView):
+
+    def get_page_cache_tags(self):
+        category = categories.get(self.kwargs['category_slug'])
+        return [f'category:{category.id}'] if category else []
+
+    def get_queryset(self):
+        category = categories.get(self.kwargs['category_slug'])
+        if category is None or not category.is_published:
+            raise Http404
+        return Post.objects.in_category(category.id)
+
+
+class ProfileApiView(PostListApiView):
+    user_dependent = True
+
+    def get_page_cache_tags(self):
+        profile = get_profile(self.kwargs['username'])
+        return [f'author:{profile["id"]}'] if profile else []
+
+    def get_queryset(self):
+        profile = get_profile(self.kwargs['username'])
+        if profile is None:
+            raise Http404
+        return Post.objects.by_author(profile['id'], self.request.user.id)
+
+
+class PostDetailApiView(ApiView):
+    """Публикация и первая страница комментариев к ней.
+
+    Следующие страницы комментариев — тот же адрес с ?cursor=.
+    Правила видимости те же, что у PostDetailView: нужен вход,
+    а снятую с публикации или отложенную публикацию видит только автор.
+    """
+    paginate_by = 20
+    user_dependent = True
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Требуется авторизация.'}, status=401)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_data(self):
+        names = parse_fields(
+            self.request.GET.get('fields'), POST_FIELDS, POST_FIELDS)
+        post = get_object_or_404(
+            Post.objects.values(*columns(
+                names, POST_FIELDS, ('author_id', 'is_published', 'pub_date')
+            )),
+            pk=self.kwargs['post_pk'],
+        )
+        if not post['is_published'] or post['pub_date'] > tz.now():
+            if post['author_id'] != self.request.user.id:
+                raise Http404
+        ordering = ('created_at', 'id')
+        comments = self.paginate(
+            Comment.objects.filter(post_id=self.kwargs['post_pk']).values(
+                *columns(COMMENT_FIELDS, COMMENT_FIELDS, ordering)),
+            ordering,
+        )
+        return {
+            'post': serialize([post], names, POST_FIELDS)[0],
+            'comments': serialize(comments, COMMENT_FIELDS, COMMENT_FIELDS),
+            'next_cursor': comments.next_cursor,
+        }
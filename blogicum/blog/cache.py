@@ -0,0 +1,195 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .models import Follow, Post
+from .scheduler import cache_timeout
+
+User = get_user_model()
+
+POST_CARD_FRAGMENT = 'post_card'
+
+
+def fragment_cache():
+    # Тот же выбор кэша, что и у тега {% cache %}.
+    try:
+        return caches['template_fragments']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def require_shared_cache(command):
+    """Прерывает команду `command`, если кэш живёт в памяти процесса.
+
+    Такая команда сбрасывала бы кэш только у себя: веб-процессы её
+    изменений не увидят. В тестах (есть mail.outbox) всё выполняется
+    в одном процессе, и проверка не нужна.
+    """
+    if isinstance(caches['default'], LocMemCache) and not hasattr(
+            mail, 'outbox'):
+        raise CommandError(
+            f'{command}: кэш default хранится в памяти процесса, '
+            'веб-процессы не увидят сброса. Настройте общий кэш '
+            '(CACHES, см. README).'
+        )
+
+
+def post_card_key(post_id, updated_at, comment_count):
+    """Ключ фрагмента includes/post_card.html.
+
+    Должен совпадать с аргументами тега {% cache %} в шаблоне.
+    """
+    return make_template_fragment_key(
+        POST_CARD_FRAGMENT,
+        [post_id, updated_at.timestamp(), comment_count],
+    )
+
+
+def forget_post_cards(posts):
+    """Удаляет закэшированные карточки публикаций из queryset."""
+    keys = [
+        post_card_key(*values)
+        for values in posts.values_list('id', 'updated_at', 'comment_count')
+    ]
+    if keys:
+        fragment_cache().delete_many(keys)
+
+
+def profile_key(user_id):
+    return f'blog:profile:{user_id}'
+
+
+def profile_id_key(username):
+    return f'blog:profile:id:{username}'
+
+
+# В кэш попадают только поля шапки профиля и API, без пароля и почты.
+PROFILE_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'date_joined', 'is_staff',
+)
+
+
+def get_profile(username):
+    """Шапка профиля: словарь PROFILE_FIELDS с полным именем
+    и числом публикаций и подписчиков.
+
+    Возвращает None, если пользователя нет. Шапка кэшируется по id
+    пользователя, чтобы сигналы публикаций сбрасывали её по author_id
+    без запроса имени; имя сопоставляется с id отдельным ключом.
+    Результат хранится до изменения профиля или публикаций автора
+    и не дольше, чем до выхода ближайшей отложенной публикации.
+    """
+    user_id = cache.get(profile_id_key(username))
+    profile = cache.get(profile_key(user_id)) if user_id else None
+    # После переименования старое имя может указывать на чужой профиль.
+    if profile is None or profile['username'] != username:
+        profile = User.objects.filter(username=username).values(
+            *PROFILE_FIELDS).first()
+        if profile is None:
+            return None
+        profile['full_name'] = (
+            f'{profile["first_name"]} {profile["last_name"]}'.strip())
+        profile['post_count'] = Post.published_posts().filter(
+            author_id=profile['id']
+        ).count()
+        profile['follower_count'] = Follow.objects.filter(
+            author_id=profile['id']).count()
+        timeout = cache_timeout(settings.BLOG_PROFILE_CACHE_TIMEOUT)
+        cache.set_many({
+            profile_id_key(username): profile['id'],
+            profile_key(profile['id']): profile,
+        }, timeout)
+    return profile
+
+
+def forget_profile(*user_ids):
+    cache.delete_many([profile_key(user_id) for user_id in user_ids])
+
+
+def tag_key(tag):
+    return f'blog:tag:{tag}'
+
+
+def current_tag_versions(tags):
+    """Текущие версии тегов; отсутствующие теги получают новую версию."""
+    keys = {tag: tag_key(tag) for tag in tags}
+    stored = cache.get_many(keys.values())
+    missing = [key for key in keys.values() if key not in stored]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        stored.update(cache.get_many(missing))
+    return {tag: stored.get(key) for tag, key in keys.items()}
+
+
+def purge_tags(*tags):
+    """Сбрасывает закэшированные страницы, помеченные любым из тегов.
+
+    Версии удаляются сразу и ещё раз после фиксации транзакции: иначе
+    страница, собранная до фиксации, осталась бы в кэше с новой версией.
+    """
+    keys = [tag_key(tag) for tag in tags]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'blog:page:{path}'
+
+
+def page_response(entry):
+    """HttpResponse из записи кэша страниц с заголовками для прокси."""
+    response = HttpResponse(
+        entry['content'], content_type=entry['content_type']
+    )
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    response['Surrogate-Key'] = ' '.join(entry['tags'])
+    # Прокси и браузеры хранят страницу, но сверяются с сервером
+    # по ETag/Last-Modified и получают 304, пока она не изменилась.
+    patch_cache_control(response, public=True, max_age=0)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def get_cached_page(key):
+    """Запись страницы или None, если её нет или сброшен любой её тег."""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if cache.get_many(map(tag_key, entry['tags'])) != {
+        tag_key(tag): version for tag, version in entry['tags'].items()
+    }:
+        return None
+    return entry
+
+
+def cache_page(key, response, versions, timeout, last_modified):
+    """Сохраняет отрисованную страницу под версиями тегов `versions`.
+
+    Версии нужно прочитать до отрисовки: сброс тега во время
+    отрисовки тогда сразу делает запись недействительной.
+    """
+    content = response.content
+    entry = {
+        'content': content,
+        'content_type': response['Content-Type'],
+        'etag': quote_etag(hashlib.md5(content).hexdigest()),
+        'last_modified': last_modified,
+        'tags': versions,
+    }
+    if timeout > 0:
+        cache.set(key, entry, timeout)
+    return entry
@@ -0,0 +1,15 @@
+from django.utils.functional import SimpleLazyObject
+
+from .notifications import unread_count
+
+
+def notifications(request):
+    """Число непрочитанных уведомлений для шапки.
+
+    Значение вычисляется лениво, только если шаблон его выводит,
+    и берётся из кэшированного счётчика.
+    """
+    def unread():
+        user = request.user
+        return unread_count(user.id) if user.is_authenticated else 0
+    return {'unread_notifications': SimpleLazyObject(unread)}
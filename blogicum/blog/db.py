@@ -0,0 +1,114 @@
+import itertools
+import threading
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Cookie «недавно писал»: пока она жива, чтения этого клиента идут
+# на основную базу, и он видит свои изменения несмотря на отставание
+# реплик.
+PIN_COOKIE = 'blog_primary'
+
+_state = Local()
+_counter = itertools.count()
+_lock = threading.Lock()
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик connection_created: PRAGMA из BLOG_SQLITE_PRAGMAS."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'BLOG_SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def replicas():
+    return list(getattr(settings, 'BLOG_READ_REPLICAS', ()))
+
+
+def choose_replica():
+    """Следующая реплика по кругу или None, если реплик нет."""
+    aliases = replicas()
+    if not aliases:
+        return None
+    with _lock:
+        index = next(_counter)
+    return aliases[index % len(aliases)]
+
+
+@contextmanager
+def read_from_replica():
+    """Направляет чтения внутри блока на одну реплику.
+
+    Реплика выбирается один раз на весь блок, чтобы страница
+    собиралась из одного снимка данных. Запись или закреплённый
+    клиент возвращают чтения на основную базу.
+    """
+    previous = getattr(_state, 'replica', None)
+    _state.replica = choose_replica()
+    try:
+        yield
+    finally:
+        _state.replica = previous
+
+
+def start_request(pinned):
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def finish_request():
+    """Было ли в запросе обращение на запись; сбрасывает состояние."""
+    wrote = getattr(_state, 'wrote', False)
+    _state.pinned = _state.wrote = False
+    return wrote
+
+
+class ReplicaRouter:
+    """Чтения в read_from_replica() — на реплику, остальное — на default."""
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'pinned', False) or getattr(_state, 'wrote',
+                                                       False):
+            return DEFAULT_DB_ALIAS
+        return getattr(_state, 'replica', None)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же строки, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in replicas()
+
+
+class PrimaryPinMiddleware:
+    """Закрепляет клиента за основной базой после записи.
+
+    Ставится до SessionMiddleware, чтобы сохранение сессии
+    (например, при входе) тоже считалось записью.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start_request(PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = finish_request()
+        if wrote and replicas():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.BLOG_PRIMARY_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,123 @@
+import json
+import math
+import time
+
+from blog.models import Category, Post
+from blog.views import IndexListView
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку и число SQL-запросов страниц ленты '
+            'и выводит результат в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Сколько замеров делать для каждой страницы.')
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Сколько запросов сделать до начала замеров.')
+        parser.add_argument(
+            '--page', type=int, default=1,
+            help='Номер страницы ленты, категории и профиля.')
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэши перед каждым запросом.')
+        parser.add_argument(
+            '--output', default=None,
+            help='Файл для результата; по умолчанию stdout.')
+
+    def get_targets(self, page):
+        post = Post.published_posts().order_by('-comment_count').first()
+        category = Category.objects.filter(is_published=True).annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        author = User.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        if not (post and category and author):
+            raise CommandError(
+                'В базе нет опубликованных данных; '
+                'заполните её командой seed_blog.')
+
+        def page_query(total):
+            # Для небольших категорий и профилей берётся последняя
+            # существующая страница.
+            last_page = max(math.ceil(total / IndexListView.paginate_by), 1)
+            number = min(page, last_page)
+            return f'?page={number}' if number > 1 else ''
+
+        return author, {
+            'index': reverse('blog:index') + page_query(
+                Post.published_posts().count()),
+            'category_posts': reverse(
+                'blog:category_posts', args=(category.slug,)
+            ) + page_query(Post.published_posts().filter(
+                category=category).count()),
+            'profile': reverse(
+                'blog:profile', args=(author.username,)
+            ) + page_query(author.total),
+            'post_detail': reverse('blog:post_detail', args=(post.pk,)),
+        }
+
+    def measure(self, client, url, cold):
+        if cold:
+            for cache in caches.all():
+                cache.clear()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise CommandError(f'{url}: статус {response.status_code}')
+        return elapsed, len(queries)
+
+    def handle(self, *args, **options):
+        user, targets = self.get_targets(options['page'])
+        report = {
+            'requests': options['requests'],
+            'page': options['page'],
+            'cold': options['cold'],
+            'views': {},
+        }
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['*']):
+            client = Client()
+            client.force_login(user)
+            for name, url in targets.items():
+                for _ in range(options['warmup']):
+                    self.measure(client, url, options['cold'])
+                timings, queries = [], []
+                for _ in range(options['requests']):
+                    elapsed, n_queries = self.measure(
+                        client, url, options['cold'])
+                    timings.append(elapsed)
+                    queries.append(n_queries)
+                report['views'][name] = {
+                    'url': url,
+                    'p50_ms': round(percentile(timings, 50), 2),
+                    'p95_ms': round(percentile(timings, 95), 2),
+                    'p99_ms': round(percentile(timings, 99), 2),
+                    'queries_per_request': sum(queries) / len(queries),
+                }
+        result = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(result + '\n')
+        else:
+            self.stdout.write(result)
@@ -0,0 +1,26 @@
+import time
+
+from blog.trending import compute
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг «Популярного» и переносит '
+            'в него накопленные просмотры.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, пересчитывая раз в --interval.')
+        parser.add_argument(
+            '--interval', type=int, default=60,
+            help='Пауза между пересчётами в режиме --loop, секунд.')
+
+    def handle(self, *args, **options):
+        while True:
+            written = compute()
+            if written:
+                self.stdout.write(f'Обновлено строк рейтинга: {written}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,60 @@
+import gzip
+import sys
+from contextlib import contextmanager
+
+from blog.pagination import CursorEncoder
+from django.apps import apps
+from django.core import serializers
+from django.core.management.base import BaseCommand
+
+# Порядок важен: при загрузке строки, на которые ссылаются
+# внешние ключи, должны идти раньше ссылающихся.
+BLOG_MODELS = (
+    'auth.user',
+    'blog.category',
+    'blog.location',
+    'blog.post',
+    'blog.comment',
+)
+
+
+@contextmanager
+def open_dump(path, mode):
+    """Файл выгрузки; `-` — stdin/stdout, `.gz` — сжатый gzip."""
+    if path == '-':
+        yield sys.stdout if mode == 'w' else sys.stdin
+    elif path.endswith('.gz'):
+        with gzip.open(path, mode + 't', encoding='utf-8') as fh:
+            yield fh
+    else:
+        with open(path, mode, encoding='utf-8') as fh:
+            yield fh
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, категории, местоположения, '
+            'публикации и комментарии в NDJSON: по объекту на строку.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', help='Файл выгрузки; `-` — стандартный вывод.')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько строк читать из базы за один запрос.')
+
+    def handle(self, *args, output, batch_size, **options):
+        serializer = serializers.get_serializer('jsonl')()
+        with open_dump(output, 'w') as stream:
+            for label in BLOG_MODELS:
+                model = apps.get_model(label)
+                # Связи многие-ко-многим (группы и права пользователей)
+                # не выгружаются: это не данные блога.
+                fields = [field.name for field in model._meta.concrete_fields
+                          if not field.primary_key]
+                # CursorEncoder, в отличие от DjangoJSONEncoder,
+                # не округляет время до миллисекунд.
+                serializer.serialize(
+                    model._default_manager.order_by('pk').iterator(
+                        chunk_size=batch_size),
+                    stream=stream, fields=fields, cls=CursorEncoder,
+                )
@@ -0,0 +1,26 @@
+import time
+
+from blog.reactions import flush
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Переносит накопленные приращения реакций в счётчики '
+            'публикаций.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, сбрасывая счётчики раз в --interval.')
+        parser.add_argument(
+            '--interval', type=int, default=10,
+            help='Пауза между сбросами в режиме --loop, секунд.')
+
+    def handle(self, *args, **options):
+        while True:
+            updated = flush()
+            if updated:
+                self.stdout.write(f'Обновлено публикаций: {updated}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
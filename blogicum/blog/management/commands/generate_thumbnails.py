@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from blog.cache import purge_tags
+from blog.models import Post
+from blog.thumbnails import generate
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Создаёт превью изображений публикаций, у которых их нет, '
+            'в пуле процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Сколько процессов обрабатывают изображения.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать превью и для обработанных изображений.')
+
+    def handle(self, *args, workers, force, **options):
+        pending = [
+            (post_id, image)
+            for post_id, image, data in Post.objects.exclude(
+                image=''
+            ).values_list('pk', 'image', 'thumbnail_data').iterator()
+            if force or data.get('source') != image
+        ]
+        if not pending:
+            self.stdout.write('Все превью уже созданы.')
+            return
+        # Дочерние процессы работают только с файлами; соединения
+        # с базой закрываются, чтобы не достаться им при fork().
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(generate, name): (post_id, name)
+                for post_id, name in pending
+            }
+            for future in as_completed(futures):
+                post_id, name = futures[future]
+                try:
+                    widths = future.result()
+                except OSError as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                Post.set_thumbnails(post_id, name, widths)
+                purge_tags(f'post:{post_id}')
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано превью: {done}, ошибок: {failed}.'
+        ))
@@ -0,0 +1,138 @@
+from collections import Counter
+from contextlib import contextmanager
+
+from blog.cache import forget_post_cards, forget_profile, purge_tags
+from blog.models import Category, Comment, Location, Post
+from blog.registry import categories
+from blog.scheduler import forget_schedule
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone as tz
+
+from .dumpblog import open_dump
+
+User = get_user_model()
+
+
+def cache_tags(instance):
+    """Теги кэша страниц, которые затрагивает загруженный объект."""
+    if isinstance(instance, Post):
+        tags = [f'post:{instance.pk}', f'author:{instance.author_id}',
+                f'category:{instance.category_id}']
+        if instance.location_id:
+            tags.append(f'location:{instance.location_id}')
+        return tags
+    if isinstance(instance, Comment):
+        return [f'post:{instance.post_id}']
+    if isinstance(instance, Category):
+        return [f'category:{instance.pk}']
+    if isinstance(instance, Location):
+        return [f'location:{instance.pk}']
+    if isinstance(instance, User):
+        return [f'author:{instance.pk}']
+    return []
+
+
+@contextmanager
+def preserve_timestamps(model, batch):
+    """Отключает auto_now/auto_now_add, чтобы bulk_create сохранил
+    даты из выгрузки, а не подставил текущее время.
+
+    Пустые даты (поле появилось позже выгрузки) заполняются
+    текущим временем, как при обычном сохранении.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    now = tz.now()
+    for obj in batch:
+        for field in fields:
+            if getattr(obj, field.attname) is None:
+                setattr(obj, field.attname, now)
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = ('Загружает NDJSON-выгрузку dumpblog пачками bulk_create, '
+            'сохраняя первичные ключи.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', help='Файл выгрузки; `-` — стандартный ввод.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько объектов вставлять в одной транзакции.')
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать строки с уже существующими ключами.')
+
+    def flush(self, model, batch):
+        with transaction.atomic(), preserve_timestamps(model, batch):
+            model._default_manager.bulk_create(
+                batch, ignore_conflicts=self.ignore_conflicts)
+        self.counts[model] += len(batch)
+        self.purge_batch(model, batch)
+        batch.clear()
+
+    def purge_batch(self, model, batch):
+        # bulk_create не посылает сигналов: теги затронутых страниц,
+        # карточки и профили сбрасываются по каждой пачке, чтобы
+        # память не росла с размером выгрузки. Остальной кэш (сессии,
+        # счётчики, ограничения частоты) не трогается.
+        tags = set()
+        for instance in batch:
+            tags.update(cache_tags(instance))
+        if tags:
+            purge_tags(*tags)
+        ids = [instance.pk for instance in batch]
+        if model is Post:
+            forget_post_cards(Post.objects.filter(pk__in=ids))
+        elif model is User:
+            forget_profile(*ids)
+
+    def purge_caches(self):
+        purge_tags('feed', 'trending')
+        if Category in self.counts:
+            categories.invalidate()
+        forget_schedule()
+
+    def handle(self, *args, input, batch_size, ignore_conflicts,
+               **options):
+        self.ignore_conflicts = ignore_conflicts
+        self.counts = Counter()
+        model, batch = None, []
+        with open_dump(input, 'r') as stream:
+            # Десериализатор jsonl читает поток построчно, поэтому
+            # в памяти не больше одной пачки объектов.
+            for obj in serializers.deserialize(
+                    'jsonl', stream, ignorenonexistent=True):
+                instance = obj.object
+                if batch and (type(instance) is not model
+                              or len(batch) >= batch_size):
+                    self.flush(model, batch)
+                model = type(instance)
+                batch.append(instance)
+            if batch:
+                self.flush(model, batch)
+
+        # Ключи вставлены явно; последовательности PostgreSQL нужно
+        # сдвинуть за них (для SQLite список команд пуст).
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), list(self.counts)):
+                cursor.execute(sql)
+        self.purge_caches()
+        for model, count in self.counts.items():
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
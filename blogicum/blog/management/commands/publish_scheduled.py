@@ -0,0 +1,50 @@
+import time
+from datetime import timedelta
+
+from blog.cache import forget_profile, purge_tags, require_shared_cache
+from blog.scheduler import (due_posts, forget_schedule, next_publication,
+                            seconds_until, set_watermark)
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Сбрасывает кэш страниц, на которых должны появиться '
+            'вышедшие отложенные публикации.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, просыпаясь к выходу публикаций.')
+        parser.add_argument(
+            '--max-sleep', type=int, default=60,
+            help='Наибольшая пауза между проверками в режиме --loop, секунд.')
+        parser.add_argument(
+            '--lookback', type=int, default=60,
+            help='За сколько минут брать публикации при первом запуске.')
+
+    def publish(self, lookback):
+        posts, now = due_posts(lookback)
+        rows = list(posts.values_list('id', 'category_id', 'author_id'))
+        if rows:
+            tags = {'feed'}
+            for post_id, category_id, author_id in rows:
+                tags |= {f'post:{post_id}', f'category:{category_id}',
+                         f'author:{author_id}'}
+            purge_tags(*tags)
+            forget_profile(*{author_id for *_, author_id in rows})
+            self.stdout.write(f'Вышло публикаций: {len(rows)}')
+        forget_schedule()
+        set_watermark(now)
+
+    def handle(self, *args, **options):
+        require_shared_cache('publish_scheduled')
+        lookback = timedelta(minutes=options['lookback'])
+        while True:
+            self.publish(lookback)
+            if not options['loop']:
+                break
+            moment = next_publication()
+            pause = options['max_sleep']
+            if moment is not None:
+                pause = min(pause, seconds_until(moment))
+            time.sleep(pause)
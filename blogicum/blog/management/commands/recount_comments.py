@@ -0,0 +1,51 @@
+from blog.models import Comment, Post
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённые счётчики комментариев публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько публикаций проверять в одной транзакции.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать расхождения, ничего не исправляя.')
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        actual = Coalesce(Subquery(
+            Comment.objects.filter(
+                post=OuterRef('pk')
+            ).order_by().values('post').annotate(
+                total=Count('pk')
+            ).values('total')
+        ), 0)
+        bounds = Post.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write('Публикаций нет.')
+            return
+        stale_total = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            batch = Post.objects.filter(
+                pk__gte=start, pk__lt=start + batch_size
+            )
+            with transaction.atomic():
+                stale = list(
+                    batch.annotate(actual=actual).exclude(
+                        comment_count=F('actual')
+                    ).values_list('pk', flat=True)
+                )
+                if stale and not dry_run:
+                    Post.objects.filter(pk__in=stale).update(
+                        comment_count=actual
+                    )
+            stale_total += len(stale)
+        verb = 'Найдено' if dry_run else 'Исправлено'
+        self.stdout.write(
+            self.style.SUCCESS(f'{verb} счётчиков с расхождением: '
+                               f'{stale_total}.')
+        )
@@ -0,0 +1,62 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from blog.tasks import claim, execute, fail_abandoned
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.utils import timezone as tz
+
+
+def run(task_row):
+    # У каждого потока своё соединение с базой; закрываем его,
+    # чтобы потоки пула не держали соединения между задачами.
+    try:
+        return execute(task_row)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди blog.tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Сколько задач выполнять одновременно.')
+        parser.add_argument(
+            '--visibility-timeout', type=int, default=300,
+            help=('Через сколько секунд незавершённая задача '
+                  'снова выдаётся обработчикам.'))
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза между проверками пустой очереди, секунд.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.')
+
+    def handle(self, *args, threads, visibility_timeout, poll, once,
+               **options):
+        # С одним потоком задачи выполняются в основном потоке команды.
+        pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+        done = failed = 0
+        try:
+            while True:
+                close_old_connections()
+                fail_abandoned(tz.now())
+                batch = claim(threads, visibility_timeout)
+                if not batch:
+                    if once:
+                        break
+                    time.sleep(poll)
+                    continue
+                results = pool.map(run, batch) if pool else map(
+                    execute, batch)
+                for ok in results:
+                    done += ok
+                    failed += not ok
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}.'
+        ))
@@ -0,0 +1,152 @@
+import json
+import random
+from datetime import timedelta
+from itertools import islice
+
+from blog.models import Category, Comment, Location, Post
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+User = get_user_model()
+
+SAMPLE_PATH = settings.BASE_DIR / 'db.jsonl'
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = ('Генерирует пользователей, категории, местоположения, '
+            'публикации и комментарии по образцу db.jsonl.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько объектов вставлять одним bulk_create.')
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='Начальное значение генератора для повторяемых данных.')
+        parser.add_argument(
+            '--sample', default=str(SAMPLE_PATH),
+            help='Фикстура, из которой берутся тексты и названия.')
+
+    def load_samples(self, path):
+        samples = {}
+        with open(path, encoding='utf-8') as fh:
+            for line in fh:
+                if line.strip():
+                    obj = json.loads(line)
+                    samples.setdefault(obj['model'], []).append(obj['fields'])
+        return samples
+
+    def insert(self, model, objects, batch_size):
+        total = 0
+        for batch in batched(objects, batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=batch_size)
+            total += len(batch)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {total}')
+
+    def next_pk(self, model):
+        # bulk_create не возвращает pk на SQLite, поэтому ключи
+        # назначаются заранее — по ним строятся внешние ключи.
+        return (model.objects.aggregate(pk=Max('pk'))['pk'] or 0) + 1
+
+    def handle(self, *args, **options):
+        if options['posts'] and not (options['users']
+                                     and options['categories']):
+            raise CommandError(
+                'Для публикаций нужны хотя бы один пользователь '
+                'и одна категория.')
+        rnd = random.Random(options['seed'])
+        samples = self.load_samples(options['sample'])
+        batch_size = options['batch_size']
+        tag = f'{rnd.getrandbits(32):08x}'
+        now = timezone.now()
+
+        password = make_password('password')
+        first_user = self.next_pk(User)
+        self.insert(User, (
+            User(pk=first_user + i, username=f'user_{tag}_{i}',
+                 password=password, email=f'user_{tag}_{i}@example.com')
+            for i in range(options['users'])
+        ), batch_size)
+
+        category_samples = samples['blog.category']
+        first_category = self.next_pk(Category)
+        self.insert(Category, (
+            Category(
+                pk=first_category + i,
+                title=category_samples[i % len(category_samples)]['title'],
+                description=rnd.choice(category_samples)['description'],
+                slug=f'{category_samples[i % len(category_samples)]["slug"]}'
+                     f'-{tag}-{i}',
+                is_published=rnd.random() < 0.9,
+            )
+            for i in range(options['categories'])
+        ), batch_size)
+
+        location_samples = samples['blog.location']
+        first_location = self.next_pk(Location)
+        self.insert(Location, (
+            Location(pk=first_location + i,
+                     name=rnd.choice(location_samples)['name'],
+                     is_published=rnd.random() < 0.9)
+            for i in range(options['locations'])
+        ), batch_size)
+
+        n_posts = options['posts']
+        post_samples = samples['blog.post']
+        first_post = self.next_pk(Post)
+
+        def make_post(i):
+            sample = rnd.choice(post_samples)
+            # Около 2% публикаций отложены на будущее.
+            shift = timedelta(minutes=rnd.randint(-525600, 10000))
+            return Post(
+                pk=first_post + i,
+                title=sample['title'],
+                text=sample['text'],
+                pub_date=now + shift,
+                is_published=rnd.random() < 0.95,
+                author_id=first_user + rnd.randrange(options['users']),
+                category_id=first_category
+                + rnd.randrange(options['categories']),
+                location_id=(
+                    first_location + rnd.randrange(options['locations'])
+                    if options['locations'] and rnd.random() < 0.8
+                    else None
+                ),
+            )
+
+        self.insert(Post, (make_post(i) for i in range(n_posts)),
+                    batch_size)
+
+        # Популярные публикации собирают больше комментариев.
+        comment_texts = [sample['text'][:200] for sample in post_samples]
+        self.insert(Comment, (
+            Comment(
+                text=rnd.choice(comment_texts),
+                post_id=first_post + min(
+                    int(rnd.paretovariate(1.2)) - 1, n_posts - 1
+                ),
+                author_id=first_user + rnd.randrange(options['users']),
+            )
+            for _ in range(options['comments'] if n_posts else 0)
+        ), batch_size)
+        call_command('recount_comments', batch_size=batch_size,
+                     stdout=self.stdout)
@@ -0,0 +1,77 @@
+from blog.search import SQLITE_TRIGGERS
+from django.db import migrations
+
+SQLITE_FORWARD = (
+    "CREATE VIRTUAL TABLE blog_search USING fts5("
+    "title, text, post_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    # Заголовок весит в десять раз больше текста.
+    "INSERT INTO blog_search(blog_search, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    "INSERT INTO blog_search(rowid, title, text, post_id) "
+    "SELECT id * 2, title, text, id FROM blog_post",
+    "INSERT INTO blog_search(rowid, title, text, post_id) "
+    "SELECT id * 2 + 1, '', text, post_id FROM blog_comment",
+)
+# Триггеры устанавливает и post_migrate (blog.search.install_triggers):
+# текст DDL хранится только в blog.search.
+SQLITE_FORWARD += SQLITE_TRIGGERS
+
+SQLITE_BACKWARD = (
+    "DROP TRIGGER IF EXISTS blog_search_post_insert",
+    "DROP TRIGGER IF EXISTS blog_search_post_update",
+    "DROP TRIGGER IF EXISTS blog_search_post_delete",
+    "DROP TRIGGER IF EXISTS blog_search_comment_insert",
+    "DROP TRIGGER IF EXISTS blog_search_comment_update",
+    "DROP TRIGGER IF EXISTS blog_search_comment_delete",
+    "DROP TABLE IF EXISTS blog_search",
+)
+
+# Выражения повторяют SearchVector из blog.search.PostgresSearch,
+# иначе планировщик не воспользуется индексами.
+POSTGRES_FORWARD = (
+    "CREATE INDEX blog_post_search_idx ON blog_post USING gin (("
+    "setweight(to_tsvector('russian'::regconfig, "
+    "COALESCE((title)::text, '')), 'A') || "
+    "setweight(to_tsvector('russian'::regconfig, "
+    "COALESCE((text)::text, '')), 'D')))",
+    "CREATE INDEX blog_comment_search_idx ON blog_comment USING gin (("
+    "to_tsvector('russian'::regconfig, COALESCE((text)::text, ''))))",
+)
+
+POSTGRES_BACKWARD = (
+    "DROP INDEX IF EXISTS blog_post_search_idx",
+    "DROP INDEX IF EXISTS blog_comment_search_idx",
+)
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+}
+
+
+def run(schema_editor, backward):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[backward]:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    run(schema_editor, backward=False)
+
+
+def drop_search_index(apps, schema_editor):
+    run(schema_editor, backward=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_comment_post_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,25 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='blog.post')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('views', models.PositiveBigIntegerField(default=0, verbose_name='Просмотры')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['-score', 'post'], name='trending_rank_idx'),
+        ),
+    ]
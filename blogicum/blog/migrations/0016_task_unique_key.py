@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_trendingscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='unique_key',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True, verbose_name='Ключ уникальности'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('unique_key',), name='task_pending_unique'),
+        ),
+    ]
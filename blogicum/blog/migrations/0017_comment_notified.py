@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_task_unique_key'),
+    ]
+
+    operations = [
+        # Существующие комментарии считаются доставленными: уведомлять
+        # об истории незачем.
+        migrations.AddField(
+            model_name='comment',
+            name='notified',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Уведомление доставлено'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='notified',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Уведомление доставлено'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('notified', False)), fields=['id'], name='comment_pending_notify_idx'),
+        ),
+    ]
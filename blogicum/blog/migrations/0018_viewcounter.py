@@ -0,0 +1,25 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_comment_notified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('delta', models.PositiveBigIntegerField(default=0)),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='viewcounter',
+            constraint=models.UniqueConstraint(fields=('post', 'shard'), name='view_counter_unique'),
+        ),
+    ]
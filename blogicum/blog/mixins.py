@@ -1,22 +1,191 @@
-from blog.models import Comment, Post
+import time
+
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import get_conditional_response
+
+from .cache import (cache_page, current_tag_versions, get_cached_page,
+                    page_key, page_response)
+from .db import read_from_replica
+from .pagination import CursorPaginator, InvalidCursor
+from .reactions import reacted_posts
+from .scheduler import cache_timeout
+from .tasks import enqueue_post_tasks
 
 
 class CommentDispatchMixin:
+    """Загружает комментарий один раз и проверяет авторство.
+
+    Объект сохраняется в self.object и возвращается из get_object(),
+    поэтому UpdateView/DeleteView не запрашивают его повторно.
+    """
 
     def dispatch(self, request, *args, **kwargs):
-        instance = get_object_or_404(Comment, pk=kwargs['comment_pk'])
-        if instance.author != request.user:
+        self.object = get_object_or_404(
+            self.get_queryset(),
+            pk=kwargs['comment_pk'])
+        if self.object.author_id != request.user.id:
             raise PermissionDenied
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset=None):
+        return self.object
+
 
 class PostDispatchMixin:
+    """То же для публикации: чужой пост перенаправляет на его страницу."""
+
     def dispatch(self, request, *args, **kwargs):
-        instance = get_object_or_404(
-            Post,
+        self.object = get_object_or_404(
+            self.get_queryset(),
             pk=kwargs['post_pk'])
-        if instance.author != request.user:
+        if self.object.author_id != request.user.id:
             return redirect('blog:post_detail', self.kwargs['post_pk'])
         return super().dispatch(request, *args, **kwargs)
+
+    def get_object(self, queryset=None):
+        return self.object
+
+
+class ReplicaReadMixin:
+    """Выполняет представление только для чтения на реплике базы.
+
+    Реплики задаются настройкой BLOG_READ_REPLICAS; без них и для
+    клиентов, закреплённых за основной базой, ничего не меняется.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            # Шаблон выполняет ленивые запросы при отрисовке,
+            # поэтому она тоже должна пройти на реплике.
+            if hasattr(response, 'render') and not response.is_rendered:
+                response = response.render()
+        return response
+
+
+class PostTasksMixin:
+    """Ставит в очередь фоновую работу после сохранения публикации:
+    превью изображения и обслуживание поискового индекса."""
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        enqueue_post_tasks(self.object, form.changed_data)
+        return response
+
+
+class ReactedPostsMixin:
+    """Отмечает публикации страницы, на которые пользователь поставил
+    реакцию: кнопка в карточке отрисовывается вне кэша фрагмента."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['reacted_posts'] = reacted_posts(
+            self.request.user,
+            [post.id for post in context.get('page_obj') or ()],
+        )
+        return context
+
+
+class CursorPaginationMixin:
+    """Включает keyset-пагинацию ListView вместо постраничной.
+
+    Режим включается настройкой BLOG_CURSOR_PAGINATION; страница
+    выбирается GET-параметром `cursor`.
+    """
+    cursor_ordering = None
+    cursor_kwarg = 'cursor'
+
+    def get_cursor_pagination(self):
+        return getattr(settings, 'BLOG_CURSOR_PAGINATION', False)
+
+    def get_cursor_paginator(self, queryset, page_size):
+        return CursorPaginator(queryset, page_size, self.cursor_ordering)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.get_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = self.get_cursor_paginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class AnonymousPageCacheMixin:
+    """Кэширует страницу списка публикаций для анонимных GET-запросов.
+
+    Запись помечается тегами (`page_cache_tags` и теги каждой карточки)
+    и перестаёт действовать, когда сигналы сбрасывают любой из них.
+    Теги отдаются в заголовке Surrogate-Key, а ETag и Last-Modified
+    позволяют клиентам получать 304 при повторной проверке.
+    """
+    page_cache_tags = ()
+
+    def get_page_cache_tags(self, context):
+        tags = list(self.page_cache_tags)
+        for post in context.get('page_obj') or ():
+            tags += [
+                f'post:{post.id}',
+                f'category:{post.category_id}',
+                f'author:{post.author_id}',
+            ]
+            if post.location_id:
+                tags.append(f'location:{post.location_id}')
+        return tags
+
+    def get_page_cache_timeout(self):
+        # Страница не должна пережить выход отложенной публикации.
+        return cache_timeout(settings.BLOG_PAGE_CACHE_TIMEOUT)
+
+    def use_page_cache(self, request):
+        return (request.method in ('GET', 'HEAD')
+                and not request.user.is_authenticated)
+
+    def conditional_response(self, request, entry):
+        return get_conditional_response(
+            request,
+            etag=entry['etag'],
+            last_modified=entry['last_modified'],
+            response=page_response(entry),
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.use_page_cache(request):
+            return super().dispatch(request, *args, **kwargs)
+        key = page_key(request)
+        entry = get_cached_page(key)
+        if entry is not None:
+            return self.conditional_response(request, entry)
+        # Версии читаются до выборки и отрисовки: если тег сбросят
+        # в это время, запись сохранится со старой версией и сразу
+        # станет недействительной.
+        static_versions = current_tag_versions(self.page_cache_tags)
+        response = super().dispatch(request, *args, **kwargs)
+        if (response.status_code != 200
+                or not hasattr(response, 'add_post_render_callback')):
+            return response
+        versions = current_tag_versions(sorted(set(
+            self.get_page_cache_tags(response.context_data))))
+        versions.update(static_versions)
+
+        def store(response):
+            # Страница с CSRF-токеном (любая форма с {% csrf_token %})
+            # принадлежит одному посетителю; её cookie ставит
+            # CsrfViewMiddleware уже после отрисовки.
+            if response.cookies or request.META.get('CSRF_COOKIE_USED'):
+                return None
+            entry = cache_page(
+                key, response, versions,
+                self.get_page_cache_timeout(),
+                int(time.time()),
+            )
+            return self.conditional_response(request, entry)
+
+        response.add_post_render_callback(store)
+        return response
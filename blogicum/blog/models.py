@@ -1,10 +1,25 @@
 from django.contrib.auth import get_user_model
 from django.db import models as mdl
+from django.db.models import F, Q
 from django.urls import reverse
 from django.utils import timezone as dt
 
+from .thumbnails import srcsets
+
 User = get_user_model()
 
+# Сколько символов текста выбирать для превью в карточке: с запасом
+# на десять слов фильтра truncatewords в includes/post_card.html.
+POST_PREVIEW_LENGTH = 400
+
+# Категория карточки берётся из blog.registry по category_id.
+POST_CARD_FIELDS = (
+    'id', 'title', 'pub_date', 'is_published', 'image', 'updated_at',
+    'comment_count', 'reaction_count', 'category', 'thumbnail_data',
+    'author', 'author__username',
+    'location', 'location__name', 'location__is_published',
+)
+
 
 class BaseModel(mdl.Model):
     is_published = mdl.BooleanField(
@@ -29,9 +44,26 @@ class Comment(mdl.Model):
     )
     author = mdl.ForeignKey(User, on_delete=mdl.CASCADE)
     created_at = mdl.DateTimeField(auto_now_add=True)
+    # Ставится blog.notifications.deliver() в той же транзакции, что
+    # и уведомление; новый комментарий пишется сразу неотмеченным.
+    notified = mdl.BooleanField(
+        'Уведомление доставлено', default=False, editable=False)
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            # Страницы комментариев: post = X ORDER BY created_at, id.
+            mdl.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx',
+            ),
+            # Очередь доставки: только неотмеченные комментарии.
+            mdl.Index(
+                fields=('id',),
+                condition=Q(notified=False),
+                name='comment_pending_notify_idx',
+            ),
+        )
 
 
 class Category(BaseModel):
@@ -60,6 +92,42 @@ class Location(BaseModel):
         return self.name
 
 
+class PostQuerySet(mdl.QuerySet):
+
+    def published(self):
+        return self.filter(pub_date__lte=dt.now(),
+                           is_published=True,
+                           category__is_published=True,)
+
+    def in_category(self, category_id):
+        """Лента категории; опубликованность категории проверяет вызывающий."""
+        return self.filter(is_published=True, pub_date__lt=dt.now(),
+                           category_id=category_id)
+
+    def by_author(self, author_id, viewer_id=None):
+        """Публикации автора; скрытые и отложенные видит только он сам."""
+        queryset = self.filter(author_id=author_id)
+        if viewer_id != author_id:
+            queryset = queryset.filter(is_published=True,
+                                       pub_date__lt=dt.now())
+        return queryset
+
+    def for_cards(self):
+        """Только то, что выводит includes/post_card.html.
+
+        Связанные объекты выбираются одним JOIN, а вместо полного
+        текста публикации загружается его начало `text_preview`.
+        """
+        # extra(), а не annotate(): в Django 3.2 аннотация заставляет
+        # COUNT(*) пагинатора считать SUBSTR в подзапросе по всем строкам.
+        return self.select_related(
+            'author', 'location'
+        ).only(*POST_CARD_FIELDS).extra(
+            select={'text_preview': 'SUBSTR(blog_post.text, 1, %s)'},
+            select_params=(POST_PREVIEW_LENGTH,),
+        )
+
+
 class Post(BaseModel):
     title = mdl.CharField('Заголовок', max_length=256)
     text = mdl.TextField('Текст')
@@ -89,12 +157,70 @@ class Post(BaseModel):
         verbose_name='Категория',
         related_name='posts'
     )
+    updated_at = mdl.DateTimeField('Изменено', auto_now=True)
+    comment_count = mdl.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False)
+    # Сумма реакций на момент последнего flush_reactions; свежие
+    # приращения копятся в ReactionCounter.
+    reaction_count = mdl.PositiveBigIntegerField(
+        'Число реакций',
+        default=0,
+        editable=False)
+    # Изображение, для которого созданы превью, и их ширины:
+    # {'source': 'media/x.jpg', 'widths': [320, 640]}.
+    thumbnail_data = mdl.JSONField(
+        'Превью', default=dict, blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    # Счётчики обновляются атомарными UPDATE ... SET x = x + 1,
+    # поэтому обычный save() не должен перезаписывать их
+    # значением, прочитанным вместе с объектом.
+    MAINTAINED_FIELDS = ('comment_count', 'reaction_count', 'thumbnail_data')
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and self.pk is not None
+                and kwargs.get('update_fields') is None):
+            skipped = {*self.MAINTAINED_FIELDS, *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+                and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def change_comment_count(cls, post_id, delta):
+        # По updated_at compute_trending находит изменившиеся публикации.
+        cls.objects.filter(pk=post_id).update(
+            comment_count=F('comment_count') + delta,
+            updated_at=dt.now(),
+        )
+
+    @classmethod
+    def set_thumbnails(cls, post_id, source, widths):
+        # updated_at входит в ключ кэша карточки.
+        cls.objects.filter(pk=post_id, image=source).update(
+            thumbnail_data={'source': source, 'widths': widths},
+            updated_at=dt.now(),
+        )
+
+    @property
+    def thumbnails(self):
+        """srcset превью текущего изображения или None."""
+        if not self.image or not self.has_thumbnails():
+            return None
+        return srcsets(self.image.name, self.thumbnail_data['widths'],
+                       self.image.storage)
+
+    def has_thumbnails(self):
+        return self.thumbnail_data.get('source') == self.image.name
 
     @classmethod
     def published_posts(cls):
-        return cls.objects.filter(pub_date__lte=dt.now(),
-                                  is_published=True,
-                                  category__is_published=True,)
+        return cls.objects.published()
 
     def get_absolute_url(self):
         return reverse('blog:post_detail', {'username': self.author})
@@ -103,3 +229,248 @@ class Post(BaseModel):
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date', 'category', 'title')
+        indexes = (
+            # Лента: published_posts() в порядке ('-pub_date',
+            # 'category', 'title'); частичный индекс по is_published.
+            mdl.Index(
+                fields=('-pub_date', 'category', 'title'),
+                name='post_feed_idx',
+                condition=Q(is_published=True),
+            ),
+            # Страница категории: category = X ORDER BY -pub_date.
+            mdl.Index(
+                fields=('category', '-pub_date'),
+                name='post_category_feed_idx',
+                condition=Q(is_published=True),
+            ),
+            # Страница пользователя: author = X ORDER BY -pub_date.
+            mdl.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_feed_idx',
+            ),
+        )
+
+
+class Task(mdl.Model):
+    """Задача фоновой очереди blog.tasks, выполняемая командой runworker."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = mdl.CharField('Задача', max_length=100)
+    payload = mdl.JSONField('Аргументы', default=dict)
+    status = mdl.CharField(
+        'Состояние', max_length=16, choices=STATUSES, default=PENDING)
+    attempts = mdl.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = mdl.PositiveSmallIntegerField('Наибольшее число попыток')
+    run_after = mdl.DateTimeField('Не раньше', default=dt.now)
+    # Пока время не вышло, задача принадлежит захватившему её
+    # обработчику; после — считается брошенной и выдаётся снова.
+    locked_until = mdl.DateTimeField('Занята до', null=True, blank=True)
+    last_error = mdl.TextField('Последняя ошибка', blank=True)
+    created_at = mdl.DateTimeField('Добавлено', auto_now_add=True)
+    # Хэш имени и аргументов задачи, поставленной с unique=True.
+    unique_key = mdl.CharField(
+        'Ключ уникальности', max_length=40, null=True, blank=True,
+        editable=False)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            mdl.Index(fields=('status', 'run_after'), name='task_due_idx'),
+        )
+        constraints = (
+            # Не больше одной ожидающей задачи с тем же ключом.
+            mdl.UniqueConstraint(
+                fields=('unique_key',),
+                condition=Q(status='pending'),
+                name='task_pending_unique',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+
+class Follow(mdl.Model):
+    user = mdl.ForeignKey(
+        User,
+        on_delete=mdl.CASCADE,
+        verbose_name='Подписчик',
+        related_name='following',
+    )
+    author = mdl.ForeignKey(
+        User,
+        on_delete=mdl.CASCADE,
+        verbose_name='Автор',
+        related_name='followers',
+    )
+    created_at = mdl.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = (
+            mdl.UniqueConstraint(
+                fields=('user', 'author'), name='follow_unique'),
+            mdl.CheckConstraint(
+                check=~Q(user=F('author')), name='follow_not_self'),
+        )
+
+    def __str__(self):
+        return f'{self.user_id} → {self.author_id}'
+
+
+class TimelineEntry(mdl.Model):
+    """Публикация в домашней ленте пользователя.
+
+    Строки создаёт blog.timeline.fan_out при сохранении публикации.
+    pub_date повторяет дату публикации, поэтому страница ленты —
+    один диапазон индекса (user, -pub_date, post).
+    """
+    user = mdl.ForeignKey(
+        User, on_delete=mdl.CASCADE, related_name='+', db_index=False)
+    post = mdl.ForeignKey(Post, on_delete=mdl.CASCADE, related_name='+')
+    pub_date = mdl.DateTimeField()
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = (
+            mdl.UniqueConstraint(
+                fields=('user', 'post'), name='timeline_unique'),
+        )
+        indexes = (
+            mdl.Index(
+                fields=('user', '-pub_date', 'post'),
+                name='timeline_user_idx',
+            ),
+        )
+
+
+class Reaction(mdl.Model):
+    """Отметка «нравится» пользователя на публикации."""
+    user = mdl.ForeignKey(
+        User, on_delete=mdl.CASCADE, related_name='+', db_index=False)
+    post = mdl.ForeignKey(Post, on_delete=mdl.CASCADE, related_name='+')
+    created_at = mdl.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'реакция'
+        verbose_name_plural = 'Реакции'
+        constraints = (
+            mdl.UniqueConstraint(
+                fields=('user', 'post'), name='reaction_unique'),
+        )
+
+
+class ReactionCounter(mdl.Model):
+    """Несброшенное приращение числа реакций публикации.
+
+    Приращения публикации разнесены по BLOG_REACTION_SHARDS строкам,
+    чтобы одновременные реакции на популярную публикацию не ждали
+    блокировки одной строки; flush_reactions переносит их сумму
+    в Post.reaction_count.
+    """
+    post = mdl.ForeignKey(
+        Post, on_delete=mdl.CASCADE, related_name='+', db_index=False)
+    shard = mdl.PositiveSmallIntegerField()
+    delta = mdl.IntegerField(default=0)
+
+    class Meta:
+        constraints = (
+            mdl.UniqueConstraint(
+                fields=('post', 'shard'), name='reaction_counter_unique'),
+        )
+
+
+class Notification(mdl.Model):
+    """Уведомление автору о новых комментариях к его публикации.
+
+    Пока уведомление не прочитано, новые комментарии к той же
+    публикации увеличивают `count` вместо новой строки.
+    """
+    recipient = mdl.ForeignKey(
+        User,
+        on_delete=mdl.CASCADE,
+        verbose_name='Получатель',
+        related_name='+',
+        db_index=False,
+    )
+    post = mdl.ForeignKey(
+        Post,
+        on_delete=mdl.CASCADE,
+        verbose_name='Публикация',
+        related_name='+',
+    )
+    count = mdl.PositiveIntegerField('Новых комментариев', default=0)
+    last_comment_id = mdl.PositiveBigIntegerField('Последний комментарий')
+    is_read = mdl.BooleanField('Прочитано', default=False)
+    created_at = mdl.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = mdl.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'уведомление'
+        verbose_name_plural = 'Уведомления'
+        constraints = (
+            mdl.UniqueConstraint(
+                fields=('recipient', 'post'),
+                condition=Q(is_read=False),
+                name='notification_unread_unique',
+            ),
+        )
+        indexes = (
+            # Входящие: recipient = X ORDER BY -updated_at, -id.
+            mdl.Index(
+                fields=('recipient', '-updated_at', '-id'),
+                name='notification_inbox_idx',
+            ),
+        )
+
+
+class TrendingScore(mdl.Model):
+    """Место публикации в «Популярном».
+
+    Таблицу заполняет команда compute_trending; страница читает
+    её диапазоном индекса по score, как ленту по pub_date.
+    """
+    post = mdl.OneToOneField(
+        Post,
+        on_delete=mdl.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    score = mdl.FloatField('Рейтинг')
+    views = mdl.PositiveBigIntegerField('Просмотры', default=0)
+    updated_at = mdl.DateTimeField('Пересчитано', auto_now=True)
+
+    class Meta:
+        indexes = (
+            mdl.Index(fields=('-score', 'post'), name='trending_rank_idx'),
+        )
+
+
+class ViewCounter(mdl.Model):
+    """Непересчитанные просмотры публикации.
+
+    Просмотры разнесены по BLOG_VIEW_SHARDS строкам, как реакции
+    в ReactionCounter; compute_trending переносит их сумму
+    в TrendingScore.views.
+    """
+    post = mdl.ForeignKey(
+        Post, on_delete=mdl.CASCADE, related_name='+', db_index=False)
+    shard = mdl.PositiveSmallIntegerField()
+    delta = mdl.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = (
+            mdl.UniqueConstraint(
+                fields=('post', 'shard'), name='view_counter_unique'),
+        )
@@ -0,0 +1,126 @@
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone as tz
+
+from .models import Comment, Notification
+
+# Сколько комментариев отмечается доставленными за одну транзакцию.
+DELIVER_BATCH = 1000
+# Счётчик сбрасывается при доставке и прочтении, а срок хранения
+# ограничивает расхождение, если сброс не дошёл до кэша веб-процесса.
+UNREAD_TIMEOUT = 60 * 5
+# Шапка показывает «99+»: точнее считать незачем, а выборка id
+# с LIMIT не растёт вместе с числом непрочитанных, в отличие от COUNT.
+UNREAD_LIMIT = 100
+
+INBOX_ORDERING = ('-updated_at', '-id')
+
+
+def unread_key(user_id):
+    return f'blog:notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    """Число непрочитанных уведомлений (не больше UNREAD_LIMIT) из кэша.
+
+    Запрос к базе выполняется только при промахе.
+    """
+    key = unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = len(Notification.objects.filter(
+            recipient_id=user_id, is_read=False
+        ).values_list('pk', flat=True)[:UNREAD_LIMIT])
+        cache.set(key, count, UNREAD_TIMEOUT)
+    return count
+
+
+def forget_unread(*user_ids):
+    """Сбрасывает счётчики: их пересчитает следующий `unread_count()`.
+
+    Доставка сбрасывает счётчик, а не увеличивает его: прибавка
+    в кэше обработчика не дошла бы до веб-процессов, если кэш у них
+    не общий.
+    """
+    cache.delete_many([unread_key(user_id) for user_id in user_ids])
+
+
+def notify(comment_ids):
+    """Записывает уведомления о комментариях `comment_ids`.
+
+    Комментарии группируются по публикации: пока уведомление автора
+    не прочитано, новые комментарии увеличивают его счётчик, иначе
+    создаётся новое. Возвращает число затронутых уведомлений
+    и число новых уведомлений по получателям.
+    """
+    groups = Comment.objects.filter(
+        pk__in=comment_ids
+    ).exclude(
+        author_id=F('post__author_id')
+    ).values('post_id', 'post__author_id').annotate(
+        new=Count('id'), last=Max('id')
+    ).order_by()
+    groups = {
+        (group['post__author_id'], group['post_id']): group
+        for group in groups
+    }
+    updated = 0
+    unread = list(Notification.objects.filter(
+        is_read=False, post_id__in={post_id for _, post_id in groups}
+    ).values_list('recipient_id', 'post_id', 'pk'))
+    for recipient_id, post_id, pk in unread:
+        group = groups.pop((recipient_id, post_id), None)
+        if group is not None:
+            updated += Notification.objects.filter(pk=pk).update(
+                count=F('count') + group['new'],
+                last_comment_id=group['last'],
+                updated_at=tz.now(),
+            )
+    Notification.objects.bulk_create([
+        Notification(
+            recipient_id=recipient_id, post_id=post_id,
+            count=group['new'], last_comment_id=group['last'],
+        )
+        for (recipient_id, post_id), group in groups.items()
+    ])
+    return (updated + len(groups),
+            Counter(recipient_id for recipient_id, _ in groups))
+
+
+def deliver():
+    """Разносит уведомления о комментариях, ещё не отмеченных доставленными.
+
+    Комментарии отмечаются в той же транзакции, в которой пишутся
+    уведомления, поэтому ни сбой, ни очистка кэша не теряют и не
+    повторяют доставку. Запись идёт пачками по DELIVER_BATCH, а не
+    по строке на комментарий. Возвращает число затронутых уведомлений.
+    """
+    touched = 0
+    while True:
+        with transaction.atomic():
+            ids = list(Comment.objects.filter(
+                notified=False
+            ).order_by('pk').values_list('pk', flat=True)[:DELIVER_BATCH])
+            if not ids:
+                return touched
+            marked = Comment.objects.filter(
+                pk__in=ids, notified=False).update(notified=True)
+            if marked != len(ids):
+                # Часть пачки уже доставил параллельный запуск:
+                # откатываемся и выбираем пачку заново.
+                transaction.set_rollback(True)
+                continue
+            count, new = notify(ids)
+        touched += count
+        forget_unread(*new)
+
+
+def mark_read(user_id, notification_ids):
+    """Отмечает уведомления прочитанными и сбрасывает счётчик."""
+    if Notification.objects.filter(
+        recipient_id=user_id, pk__in=notification_ids, is_read=False
+    ).update(is_read=True):
+        forget_unread(user_id)
@@ -0,0 +1,153 @@
+import base64
+import datetime
+import json
+
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder округляет время до миллисекунд, а граничное
+    # значение курсора должно совпадать с хранимым до микросекунды.
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage:
+    """Страница ленты, адресуемая курсором вместо номера.
+
+    Повторяет ту часть интерфейса `django.core.paginator.Page`,
+    которой пользуются шаблоны и ListView.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по заданному упорядочиванию.
+
+    Вместо OFFSET и COUNT(*) каждая страница выбирается условием
+    «строго после/до граничной записи» и LIMIT per_page + 1.
+    Последнее поле `ordering` должно быть уникальным (обычно `id`),
+    а все поля — не допускать NULL.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+
+    def _value(self, item, field):
+        if isinstance(item, dict):
+            return item[field]
+        return getattr(item, field)
+
+    def encode_cursor(self, item, direction):
+        values = [self._value(item, field) for field in self.fields]
+        payload = json.dumps([direction, values], cls=CursorEncoder)
+        return base64.urlsafe_b64encode(
+            payload.encode()
+        ).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in (NEXT, PREVIOUS):
+                raise ValueError(direction)
+            if len(values) != len(self.fields):
+                raise ValueError(values)
+            values = [
+                self.to_python(field, value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise InvalidCursor('Неверный курсор страницы.')
+        return direction, values
+
+    def to_python(self, field, value):
+        return self.queryset.model._meta.get_field(field).to_python(value)
+
+    def _keyset_filter(self, values, reverse):
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            descending = name.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _reversed_ordering(self):
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        )
+
+    def fetch(self, values, reverse, limit):
+        """Первые `limit` записей после граничных значений `values`."""
+        queryset = self.queryset.order_by(
+            *(self._reversed_ordering() if reverse else self.ordering)
+        )
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, reverse))
+        return list(queryset[:limit])
+
+    def page(self, cursor=None):
+        direction, values = NEXT, None
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        reverse = direction == PREVIOUS
+        items = self.fetch(values, reverse, self.per_page + 1)
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if reverse:
+            items.reverse()
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else values is not None
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = self.encode_cursor(items[-1], NEXT)
+        if items and has_previous:
+            previous_cursor = self.encode_cursor(items[0], PREVIOUS)
+        return CursorPage(items, self, next_cursor, previous_cursor)
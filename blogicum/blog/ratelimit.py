@@ -0,0 +1,167 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows: файловый кэш защищён только в процессе.
+    fcntl = None
+
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 20
+LOCK_WAIT = 0.005
+
+# Вёдра в памяти процесса, если кэш недоступен.
+FALLBACK = LocMemCache('blog-ratelimit', {})
+_process_lock = threading.Lock()
+
+
+@contextmanager
+def locked(cache, keys):
+    """Делает чтение и запись вёдер `keys` атомарными.
+
+    Локальный и файловый кэши не умеют атомарного add между
+    процессами, поэтому их защищает блокировка процесса (и flock
+    файла для файлового); для общих кэшей мьютексом служит add()
+    на каждое ведро, в порядке ключей.
+    """
+    if isinstance(cache, LocMemCache):
+        with _process_lock:
+            yield
+        return
+    if isinstance(cache, FileBasedCache):
+        os.makedirs(cache._dir, exist_ok=True)
+        path = os.path.join(cache._dir, 'ratelimit.lock')
+        with _process_lock, open(path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+        return
+    # Не дождавшись мьютекса, ведро обновляется без него: при таком
+    # наплыве лишний пропущенный запрос лучше ожидания.
+    acquired = [
+        f'{key}:lock' for key in sorted(keys) if acquire(cache, key)]
+    try:
+        yield
+    finally:
+        cache.delete_many(acquired)
+
+
+def acquire(cache, key):
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(f'{key}:lock', 1, LOCK_TIMEOUT):
+            return True
+        time.sleep(LOCK_WAIT)
+    return False
+
+
+def take_from(cache, buckets, now):
+    tokens, retry_after = {}, 0
+    with locked(cache, buckets):
+        states = cache.get_many(list(buckets))
+        for key, (capacity, period) in buckets.items():
+            rate = capacity / period
+            value, updated = states.get(key) or (capacity, now)
+            tokens[key] = min(capacity, value + (now - updated) * rate)
+            if tokens[key] < 1:
+                retry_after = max(retry_after, (1 - tokens[key]) / rate)
+        if retry_after:
+            return retry_after
+        for key, (capacity, period) in buckets.items():
+            # Через `period` ведро снова полное: запись можно забыть.
+            cache.set(key, (tokens[key] - 1, now), period)
+        return 0
+
+
+def take(buckets):
+    """Берёт по токену из вёдер `buckets`: ключ → (ёмкость, период).
+
+    Токены списываются, только если их хватает во всех вёдрах:
+    отклонённый запрос не расходует лимит. Возвращает 0, если
+    запрос разрешён, иначе — секунды до появления недостающих
+    токенов.
+    """
+    now = time.time()
+    cache = caches[getattr(settings, 'BLOG_RATE_LIMIT_CACHE', 'default')]
+    try:
+        return take_from(cache, buckets, now)
+    except Exception:
+        # Кэш недоступен: ограничиваем хотя бы в пределах процесса.
+        return take_from(FALLBACK, buckets, now)
+
+
+def identities(request):
+    """Области ведра: вошедший пользователь и IP-адрес.
+
+    id пользователя читается из сессии, без загрузки самого
+    пользователя; у анонимного посетителя области 'user' нет.
+    """
+    user_id = request.session.get(SESSION_KEY)
+    if user_id:
+        yield 'user', user_id
+    yield 'ip', client_ip(request)
+
+
+def client_ip(request):
+    """Адрес клиента с учётом BLOG_TRUSTED_PROXIES.
+
+    X-Forwarded-For читается справа налево, пока адреса принадлежат
+    доверенным прокси: левее них клиент мог вписать что угодно.
+    """
+    address = request.META.get('REMOTE_ADDR', '')
+    proxies = set(getattr(settings, 'BLOG_TRUSTED_PROXIES', ()))
+    if address not in proxies:
+        return address
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+    for hop in reversed(forwarded):
+        hop = hop.strip()
+        if not hop:
+            continue
+        address = hop
+        if hop not in proxies:
+            break
+    return address
+
+
+class RateLimitMiddleware:
+    """Отвечает 429 на POST-запросы сверх RATE_LIMITS.
+
+    Проверка идёт в process_view: маршрут уже известен, а из базы
+    прочитана только сессия. Стоит после AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method != 'POST':
+            return None
+        name = request.resolver_match.view_name
+        limits = getattr(settings, 'RATE_LIMITS', {}).get(name)
+        if not limits:
+            return None
+        buckets = {
+            f'blog:ratelimit:{name}:{scope}:{identity}': limits[scope]
+            for scope, identity in identities(request) if scope in limits
+        }
+        retry_after = take(buckets) if buckets else 0
+        if not retry_after:
+            return None
+        response = HttpResponse(
+            'Слишком много запросов. Попробуйте позже.',
+            status=429, content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = math.ceil(retry_after)
+        return response
@@ -0,0 +1,85 @@
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone as tz
+
+from .cache import purge_tags
+from .models import Post, Reaction, ReactionCounter
+
+
+def add_to_counter(post_id, delta):
+    """Прибавляет `delta` к случайной строке-шарду счётчика публикации."""
+    shard = random.randrange(settings.BLOG_REACTION_SHARDS)
+    counters = ReactionCounter.objects.filter(post_id=post_id, shard=shard)
+    if counters.update(delta=F('delta') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ReactionCounter.objects.create(
+                post_id=post_id, shard=shard, delta=delta)
+    except IntegrityError:
+        # Строку шарда только что создал параллельный запрос.
+        counters.update(delta=F('delta') + delta)
+
+
+def toggle(user_id, post_id):
+    """Ставит или снимает реакцию; True, если реакция теперь стоит."""
+    with transaction.atomic():
+        deleted, _ = Reaction.objects.filter(
+            user_id=user_id, post_id=post_id).delete()
+        if deleted:
+            add_to_counter(post_id, -1)
+            return False
+        try:
+            with transaction.atomic():
+                Reaction.objects.create(user_id=user_id, post_id=post_id)
+        except IntegrityError:
+            # Двойной клик: реакцию уже поставил параллельный запрос.
+            return True
+        add_to_counter(post_id, 1)
+        return True
+
+
+def reaction_count(post):
+    """Точное число реакций: сброшенное плюс накопленное в шардах."""
+    pending = ReactionCounter.objects.filter(post_id=post.id).aggregate(
+        total=Sum('delta'))['total']
+    return post.reaction_count + (pending or 0)
+
+
+def reacted_posts(user, post_ids):
+    """id публикаций из `post_ids`, отмеченных пользователем."""
+    if not user.is_authenticated or not post_ids:
+        return set()
+    return set(Reaction.objects.filter(
+        user_id=user.id, post_id__in=post_ids
+    ).values_list('post_id', flat=True))
+
+
+def flush():
+    """Переносит накопленные приращения в Post.reaction_count.
+
+    Из шарда вычитается только прочитанное значение, поэтому
+    приращения, пришедшие во время переноса, не теряются.
+    Возвращает число обновлённых публикаций.
+    """
+    totals = defaultdict(int)
+    with transaction.atomic():
+        rows = list(ReactionCounter.objects.exclude(delta=0).values_list(
+            'pk', 'post_id', 'delta'))
+        for pk, post_id, delta in rows:
+            ReactionCounter.objects.filter(pk=pk).update(
+                delta=F('delta') - delta)
+            totals[post_id] += delta
+        for post_id, total in totals.items():
+            if total:
+                Post.objects.filter(pk=post_id).update(
+                    reaction_count=F('reaction_count') + total,
+                    updated_at=tz.now())
+        ReactionCounter.objects.filter(delta=0).delete()
+    if totals:
+        purge_tags(*(f'post:{post_id}' for post_id in totals))
+    return len(totals)
@@ -0,0 +1,74 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Category
+
+VERSION_KEY = 'blog:categories:version'
+DATA_TIMEOUT = 60 * 60 * 24
+
+
+class CategoryRegistry:
+    """Справочник категорий по slug и id.
+
+    Таблица категорий маленькая и почти не меняется, поэтому она
+    целиком хранится в памяти процесса и в общем кэше. Общий кэш
+    хранит номер версии: когда он меняется, каждый процесс
+    перечитывает список при следующем обращении.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._by_slug = {}
+        self._by_id = {}
+
+    def _data_key(self, version):
+        return f'blog:categories:{version}'
+
+    def _current_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    def _ensure_loaded(self):
+        version = self._current_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            categories = cache.get(self._data_key(version))
+            if categories is None:
+                categories = list(Category.objects.order_by('title'))
+                cache.set(self._data_key(version), categories, DATA_TIMEOUT)
+            self._by_slug = {c.slug: c for c in categories}
+            self._by_id = {c.id: c for c in categories}
+            self._version = version
+
+    def get(self, slug):
+        self._ensure_loaded()
+        return self._by_slug.get(slug)
+
+    def by_id(self, pk):
+        self._ensure_loaded()
+        return self._by_id.get(pk)
+
+    def all(self):
+        self._ensure_loaded()
+        return list(self._by_id.values())
+
+    def invalidate(self):
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+        # Повторно после фиксации транзакции: иначе другой процесс
+        # мог успеть перечитать ещё не сохранённые данные.
+        transaction.on_commit(
+            lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+        )
+
+
+categories = CategoryRegistry()
@@ -0,0 +1,71 @@
+import math
+
+from django.core.cache import cache
+from django.utils import timezone as tz
+
+from .models import Post
+
+NEXT_KEY = 'blog:schedule:next'
+WATERMARK_KEY = 'blog:schedule:watermark'
+
+# Отметка «отложенных публикаций нет»: None в кэше неотличим от промаха.
+NOTHING_SCHEDULED = 'none'
+IDLE_TIMEOUT = 60 * 60
+
+
+def next_publication():
+    """Время выхода ближайшей отложенной публикации или None.
+
+    Значение кэшируется ровно до этого момента; сигналы сбрасывают
+    его при сохранении и удалении публикаций.
+    """
+    value = cache.get(NEXT_KEY)
+    if value is None:
+        value = Post.objects.filter(
+            is_published=True, pub_date__gt=tz.now()
+        ).order_by('pub_date').values_list('pub_date', flat=True).first()
+        if value is None:
+            cache.set(NEXT_KEY, NOTHING_SCHEDULED, IDLE_TIMEOUT)
+        else:
+            cache.set(NEXT_KEY, value, seconds_until(value))
+    if value == NOTHING_SCHEDULED:
+        return None
+    return value
+
+
+def seconds_until(moment):
+    return max(math.ceil((moment - tz.now()).total_seconds()), 1)
+
+
+def cache_timeout(timeout):
+    """Время жизни кэша, не выходящее за выход следующей публикации.
+
+    Страницы, зависящие от pub_date__lte=now, устаревают ровно
+    в момент выхода отложенной публикации.
+    """
+    moment = next_publication()
+    if moment is None:
+        return timeout
+    return min(timeout, seconds_until(moment))
+
+
+def forget_schedule():
+    cache.delete(NEXT_KEY)
+
+
+def due_posts(lookback, now=None):
+    """Публикации, вышедшие после прошлого запуска publish_scheduled.
+
+    При первом запуске берутся публикации за последние `lookback`.
+    Возвращает queryset и новую отметку времени, которую нужно
+    сохранить через `set_watermark()` после обработки.
+    """
+    now = now or tz.now()
+    since = cache.get(WATERMARK_KEY) or now - lookback
+    return Post.objects.filter(
+        is_published=True, pub_date__gt=since, pub_date__lte=now
+    ), now
+
+
+def set_watermark(moment):
+    cache.set(WATERMARK_KEY, moment, None)
@@ -0,0 +1,231 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import (ExpressionWrapper, F, FloatField, OuterRef, Q,
+                              Subquery, Value)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Post
+from .pagination import CursorPaginator
+
+# Таблица FTS5 создаётся миграцией 0009_search_index и наполняется
+# триггерами на blog_post и blog_comment: публикация хранится
+# под rowid = id * 2, комментарий — под rowid = id * 2 + 1.
+SEARCH_TABLE = 'blog_search'
+SEARCH_CONFIG = 'russian'
+
+# Триггеры индекса; их ставит миграция 0009_search_index. SQLite
+# пересоздаёт таблицу при AddField/AlterField и теряет её триггеры,
+# поэтому они восстанавливаются после каждого migrate.
+SQLITE_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS blog_search_post_insert "
+    "AFTER INSERT ON blog_post "
+    "BEGIN INSERT INTO blog_search(rowid, title, text, post_id) "
+    "VALUES (new.id * 2, new.title, new.text, new.id); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_search_post_update "
+    "AFTER UPDATE OF title, text ON blog_post "
+    "BEGIN UPDATE blog_search SET title = new.title, text = new.text "
+    "WHERE rowid = new.id * 2; END",
+    "CREATE TRIGGER IF NOT EXISTS blog_search_post_delete "
+    "AFTER DELETE ON blog_post "
+    "BEGIN DELETE FROM blog_search WHERE rowid = old.id * 2; END",
+    "CREATE TRIGGER IF NOT EXISTS blog_search_comment_insert "
+    "AFTER INSERT ON blog_comment "
+    "BEGIN INSERT INTO blog_search(rowid, title, text, post_id) "
+    "VALUES (new.id * 2 + 1, '', new.text, new.post_id); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_search_comment_update "
+    "AFTER UPDATE OF text ON blog_comment "
+    "BEGIN UPDATE blog_search SET text = new.text "
+    "WHERE rowid = new.id * 2 + 1; END",
+    "CREATE TRIGGER IF NOT EXISTS blog_search_comment_delete "
+    "AFTER DELETE ON blog_comment "
+    "BEGIN DELETE FROM blog_search WHERE rowid = old.id * 2 + 1; END",
+)
+
+MAX_TERMS = 8
+SNIPPET_WORDS = 24
+
+# Границы совпадений во фрагменте; фильтр highlight заменяет их
+# на <mark> уже после экранирования текста.
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+
+def install_triggers(using='default', **kwargs):
+    """Обработчик post_migrate: восстанавливает триггеры индекса."""
+    db = connections[using]
+    if (db.vendor != 'sqlite'
+            or SEARCH_TABLE not in db.introspection.table_names()):
+        return
+    with db.cursor() as cursor:
+        for sql in SQLITE_TRIGGERS:
+            cursor.execute(sql)
+
+
+def parse_terms(text):
+    """Слова поискового запроса без операторов и кавычек."""
+    return re.findall(r'\w+', (text or '').lower())[:MAX_TERMS]
+
+
+class SQLiteSearch:
+    """Поиск по виртуальной таблице FTS5 с ранжированием bm25."""
+
+    def match(self, terms):
+        # Каждое слово берётся в кавычки, последнее ищется по префиксу:
+        # так пользовательский ввод не разбирается как синтаксис FTS5.
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def filter_posts(self, queryset, terms):
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT post_id FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND rowid %% 2 = 0',
+            (self.match(terms),),
+        ))
+
+    def hits(self, queryset, terms, values, reverse, limit):
+        visible, visible_params = queryset.filter(
+            pk=RawSQL('hits.post_id', ())
+        ).order_by().values('pk').query.sql_with_params()
+        where = [f'EXISTS ({visible})']
+        params = [self.match(terms), *visible_params]
+        if values is not None:
+            op = '<' if reverse else '>'
+            where.append(f'(hits.score {op} %s OR '
+                         f'(hits.score = %s AND hits.post_id {op} %s))')
+            params += [values[0], values[0], values[1]]
+        order = 'DESC' if reverse else 'ASC'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT hits.post_id, hits.score FROM ('
+                f'SELECT post_id, MIN(rank) AS score FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s GROUP BY post_id'
+                f') AS hits WHERE {" AND ".join(where)} '
+                f'ORDER BY hits.score {order}, hits.post_id {order} '
+                f'LIMIT %s',
+                [*params, limit],
+            )
+            return cursor.fetchall()
+
+    def snippets(self, terms, post_ids):
+        if not post_ids:
+            return {}
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, snippet({SEARCH_TABLE}, -1, %s, %s, '
+                f"'…', %s) FROM {SEARCH_TABLE} "
+                f'WHERE {SEARCH_TABLE} MATCH %s '
+                f'AND post_id IN ({placeholders}) ORDER BY rank',
+                [HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_WORDS,
+                 self.match(terms), *post_ids],
+            )
+            snippets = {}
+            for post_id, snippet in cursor.fetchall():
+                snippets.setdefault(post_id, snippet)
+            return snippets
+
+
+class PostgresSearch:
+    """Поиск по tsvector; выражения совпадают с GIN-индексами
+    из миграции 0009_search_index."""
+
+    def _query(self, terms):
+        from django.contrib.postgres.search import SearchQuery
+        return SearchQuery(' '.join(terms), config=SEARCH_CONFIG)
+
+    def _post_vector(self):
+        from django.contrib.postgres.search import SearchVector
+        return (SearchVector('title', weight='A', config=SEARCH_CONFIG)
+                + SearchVector('text', weight='D', config=SEARCH_CONFIG))
+
+    def filter_posts(self, queryset, terms):
+        return queryset.annotate(
+            search_vector=self._post_vector()
+        ).filter(search_vector=self._query(terms))
+
+    def hits(self, queryset, terms, values, reverse, limit):
+        from django.contrib.postgres.search import SearchRank, SearchVector
+        query = self._query(terms)
+        comments = Comment.objects.annotate(
+            search_vector=SearchVector('text', config=SEARCH_CONFIG)
+        ).filter(search_vector=query)
+        comment_rank = comments.filter(post=OuterRef('pk')).annotate(
+            rank=SearchRank(F('search_vector'), query, weights=[
+                0.1, 0.2, 0.4, 1.0])
+        ).order_by('-rank').values('rank')[:1]
+        ranked = queryset.annotate(
+            search_vector=self._post_vector(),
+        ).filter(
+            Q(search_vector=query)
+            | Q(pk__in=comments.values('post_id'))
+        ).annotate(
+            # Меньше — лучше, как у bm25 в SQLite.
+            search_rank=ExpressionWrapper(-Greatest(
+                SearchRank(F('search_vector'), query),
+                Coalesce(Subquery(comment_rank, output_field=FloatField()),
+                         Value(0.0)),
+            ), output_field=FloatField()),
+        )
+        paginator = CursorPaginator(ranked, limit, ('search_rank', 'id'))
+        return [(post.id, post.search_rank) for post in paginator.fetch(
+            values, reverse, limit)]
+
+    def snippets(self, terms, post_ids):
+        from django.contrib.postgres.search import SearchHeadline
+        headlines = Post.objects.filter(pk__in=post_ids).annotate(
+            search_snippet=SearchHeadline(
+                'text', self._query(terms), config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_END,
+                max_words=SNIPPET_WORDS,
+            )
+        ).values_list('id', 'search_snippet')
+        return dict(headlines)
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearch,
+    'postgresql': PostgresSearch,
+}
+
+
+def get_backend():
+    """Поиск для текущей базы данных или None, если она не поддерживается."""
+    backend = BACKENDS.get(connection.vendor)
+    return backend() if backend else None
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная пагинация результатов поиска по (рангу, id).
+
+    `queryset` задаёт видимые публикации; порядок и отбор строк
+    выполняет поисковый индекс, а карточки догружаются по id.
+    """
+
+    def __init__(self, queryset, per_page, terms, backend=None):
+        super().__init__(queryset, per_page, ('search_rank', 'id'))
+        self.terms = terms
+        self.backend = backend or get_backend()
+
+    def to_python(self, field, value):
+        if field == 'search_rank':
+            return float(value)
+        return super().to_python(field, value)
+
+    def fetch(self, values, reverse, limit):
+        hits = self.backend.hits(
+            self.queryset, self.terms, values, reverse, limit)
+        posts = self.queryset.for_cards().in_bulk(
+            [post_id for post_id, _ in hits])
+        snippets = self.backend.snippets(self.terms, list(posts))
+        items = []
+        for post_id, rank in hits:
+            post = posts.get(post_id)
+            if post is None:
+                continue
+            post.search_rank = rank
+            post.search_snippet = snippets.get(post_id, '')
+            items.append(post)
+        return items
@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import (fragment_cache, forget_post_cards, forget_profile,
+                    post_card_key, purge_tags)
+from .models import Category, Comment, Location, Post
+from .registry import categories
+from .scheduler import forget_schedule
+from .tasks import delete_post_thumbnails, enqueue, fan_out_post
+
+User = get_user_model()
+
+# Изменения самой публикации и её комментариев попадают в ключ
+# карточки через updated_at и comment_count; здесь сбрасываются
+# карточки, которые показывают данные связанных моделей.
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def forget_author_profile(sender, instance, **kwargs):
+    forget_profile(instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post_card(sender, instance, **kwargs):
+    fragment_cache().delete(post_card_key(
+        instance.pk, instance.updated_at, instance.comment_count
+    ))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def forget_category_post_cards(sender, instance, **kwargs):
+    forget_post_cards(Post.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_registry(sender, **kwargs):
+    categories.invalidate()
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def forget_location_post_cards(sender, instance, **kwargs):
+    forget_post_cards(Post.objects.filter(location=instance))
+
+
+@receiver(post_save, sender=User)
+def forget_author_post_cards(sender, instance, created, **kwargs):
+    if not created:
+        forget_post_cards(Post.objects.filter(author=instance))
+        forget_profile(instance.id)
+
+
+# Страницы, закэшированные AnonymousPageCacheMixin, помечены тегами
+# публикаций, категорий, авторов и местоположений на них.
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, **kwargs):
+    purge_tags('feed', f'post:{instance.pk}',
+               f'category:{instance.category_id}',
+               f'author:{instance.author_id}')
+    forget_schedule()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_post_pages(sender, instance, **kwargs):
+    purge_tags(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category_pages(sender, instance, **kwargs):
+    purge_tags(f'category:{instance.pk}')
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def purge_location_pages(sender, instance, **kwargs):
+    purge_tags(f'location:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def purge_author_pages(sender, instance, **kwargs):
+    purge_tags(f'author:{instance.pk}')
+
+
+# Домашние ленты подписчиков обновляются в фоне: у автора могут быть
+# тысячи подписчиков.
+
+
+@receiver(post_save, sender=Post)
+def fan_out_saved_post(sender, instance, **kwargs):
+    enqueue(fan_out_post, unique=True, post_id=instance.pk)
+
+
+# Превью удаляются в фоне вместе с публикацией или заменённым
+# изображением, иначе файлы остаются в хранилище без ссылок.
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def delete_stale_thumbnails(sender, instance, signal, **kwargs):
+    source = instance.thumbnail_data.get('source')
+    if source and (signal is post_delete or source != instance.image.name):
+        enqueue(delete_post_thumbnails, unique=True, name=source,
+                widths=instance.thumbnail_data['widths'])
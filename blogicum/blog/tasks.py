@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone as tz
+
+from .cache import purge_tags
+from .models import Post, Task
+from .notifications import deliver
+from .search import SEARCH_TABLE
+from .thumbnails import delete_thumbnails, generate
+from .timeline import (backfill, backfill_all_followers, fan_out,
+                       refresh_celebrities)
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+DEFAULT_MAX_ATTEMPTS = 3
+# Пауза перед повтором: 10 с, 20 с, 40 с...
+RETRY_DELAY = 10
+
+
+def task(name, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Регистрирует функцию как фоновую задачу под именем `name`.
+
+    Аргументы задачи сохраняются в JSON, поэтому функция принимает
+    только именованные аргументы простых типов.
+    """
+    def register(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(func, unique=False, **payload):
+    """Ставит задачу в очередь вместе с текущей транзакцией.
+
+    Обработчик увидит задачу только после фиксации транзакции.
+    С `unique=True` задача не дублирует ожидающую с теми же
+    аргументами. При BLOG_TASKS_EAGER задача выполняется сразу
+    после фиксации, без очереди.
+    """
+    if getattr(settings, 'BLOG_TASKS_EAGER', False):
+        transaction.on_commit(partial(func, **payload))
+        return None
+    row = Task(name=func.task_name, payload=payload,
+               max_attempts=func.max_attempts)
+    if not unique:
+        row.save()
+        return row
+    row.unique_key = unique_key(func.task_name, payload)
+    try:
+        with transaction.atomic():
+            row.save()
+    except IntegrityError:
+        # Такая задача уже ждёт в очереди (task_pending_unique).
+        return None
+    return row
+
+
+def unique_key(name, payload):
+    return hashlib.sha1(json.dumps(
+        [name, payload], sort_keys=True, cls=DjangoJSONEncoder
+    ).encode()).hexdigest()
+
+
+def owned(task_row):
+    """Строка задачи, пока она принадлежит захватившему обработчику.
+
+    Если видимость истекла и задачу захватили снова, у строки другой
+    locked_until, и прежний обработчик её уже не изменит.
+    """
+    return Task.objects.filter(
+        pk=task_row.pk, status=Task.RUNNING,
+        locked_until=task_row.locked_until,
+    )
+
+
+def due_tasks(now):
+    """Задачи, которые можно выдать обработчику прямо сейчас.
+
+    Кроме ожидающих, это задачи, чей обработчик не уложился
+    в видимость (например, упал), если у них остались попытки.
+    """
+    return Task.objects.filter(
+        Q(status=Task.PENDING, run_after__lte=now)
+        | Q(status=Task.RUNNING, locked_until__lt=now,
+            attempts__lt=F('max_attempts'))
+    )
+
+
+def fail_abandoned(now):
+    """Помечает ошибкой брошенные задачи без оставшихся попыток."""
+    return Task.objects.filter(
+        status=Task.RUNNING, locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(status=Task.FAILED, locked_until=None,
+             last_error='Превышено время выполнения.')
+
+
+def claim(limit, visibility_timeout):
+    """Захватывает до `limit` задач на `visibility_timeout` секунд.
+
+    Захват — условный UPDATE: если ту же задачу раньше забрал другой
+    обработчик, UPDATE не изменит строку и задача пропускается.
+    """
+    now = tz.now()
+    claimed = []
+    for pk in due_tasks(now).order_by('run_after', 'pk').values_list(
+            'pk', flat=True)[:limit]:
+        updated = due_tasks(now).filter(pk=pk).update(
+            status=Task.RUNNING,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed).order_by('pk'))
+
+
+def execute(task_row):
+    """Выполняет захваченную задачу и записывает результат."""
+    func = TASKS.get(task_row.name)
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {task_row.name}')
+        func(**task_row.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s завершилась ошибкой', task_row)
+        if task_row.attempts < task_row.max_attempts:
+            delay = RETRY_DELAY * 2 ** (task_row.attempts - 1)
+            try:
+                with transaction.atomic():
+                    owned(task_row).update(
+                        status=Task.PENDING, locked_until=None,
+                        last_error=error,
+                        run_after=tz.now() + timedelta(seconds=delay),
+                    )
+            except IntegrityError:
+                # Пока задача выполнялась, в очередь встала такая же;
+                # повтор выполнит она.
+                owned(task_row).delete()
+        else:
+            owned(task_row).update(
+                status=Task.FAILED, locked_until=None, last_error=error,
+            )
+        return False
+    owned(task_row).delete()
+    return True
+
+
+@task('blog.make_post_thumbnails')
+def make_post_thumbnails(post_id, name):
+    widths = generate(name)
+    Post.set_thumbnails(post_id, name, widths)
+    purge_tags(f'post:{post_id}')
+
+
+@task('blog.delete_post_thumbnails')
+def delete_post_thumbnails(name, widths):
+    delete_thumbnails(name, widths)
+
+
+@task('blog.merge_search_index', max_attempts=1)
+def merge_search_index(pages=500):
+    # Новые записи FTS5 копятся мелкими сегментами; слияние небольшими
+    # порциями держит поиск быстрым без полного 'optimize'.
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) '
+            f"VALUES ('merge', %s)",
+            [pages],
+        )
+
+
+@task('blog.fan_out_post')
+def fan_out_post(post_id):
+    fan_out(post_id)
+
+
+@task('blog.backfill_timeline')
+def backfill_timeline(user_id, author_id):
+    backfill(user_id, author_id)
+
+
+@task('blog.backfill_followers')
+def backfill_followers(author_id):
+    backfill_all_followers(author_id)
+
+
+@task('blog.update_celebrities')
+def update_celebrities():
+    refresh_celebrities()
+
+
+@task('blog.deliver_notifications')
+def deliver_notifications():
+    # Одна задача на пачку комментариев: пока она ждёт в очереди,
+    # новые комментарии не добавляют задач (unique=True).
+    deliver()
+
+
+def enqueue_post_tasks(post, changed_fields=()):
+    """Фоновая работа после создания или изменения публикации."""
+    if post.image and not post.has_thumbnails():
+        enqueue(make_post_thumbnails, post_id=post.pk, name=post.image.name)
+    if {'title', 'text'} & set(changed_fields):
+        enqueue(merge_search_index, unique=True)
@@ -0,0 +1,42 @@
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from ..registry import categories
+from ..search import HIGHLIGHT_END, HIGHLIGHT_START
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_category(post):
+    """Категория публикации из справочника, без запроса к БД."""
+    return categories.by_id(post.category_id)
+
+
+@register.filter
+def highlight(snippet):
+    """Выделяет совпадения во фрагменте результата поиска."""
+    return mark_safe(
+        escape(snippet)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+@register.filter
+def in_set(value, values):
+    """`value in values`, удобное в аргументах {% include ... with %}."""
+    return value in (values or ())
+
+
+@register.filter
+def ru_plural(number, forms):
+    """Форма слова для числа из трёх через запятую: «год,года,лет»."""
+    one, few, many = forms.split(',')
+    number = abs(int(number))
+    if number % 10 == 1 and number % 100 != 11:
+        return one
+    if 2 <= number % 10 <= 4 and not 12 <= number % 100 <= 14:
+        return few
+    return many
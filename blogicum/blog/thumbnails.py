@@ -0,0 +1,77 @@
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Ширины превью в пикселях; карточка публикации шириной 40rem.
+THUMBNAIL_WIDTHS = (320, 640, 1280)
+
+# Расширение файла, формат Pillow и параметры сохранения.
+THUMBNAIL_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+SIZES = '(max-width: 640px) 100vw, 640px'
+
+
+def thumbnail_name(name, width, ext):
+    """Путь превью рядом с оригиналом: thumbs/<имя.расш>-<ширина>w.<ext>.
+
+    Имя оригинала сохраняется целиком, с расширением: иначе превью
+    photo.jpg и photo.png из одного каталога перезаписывали бы друг друга.
+    """
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, 'thumbs', f'{filename}-{width}w.{ext}')
+
+
+def target_widths(original_width):
+    """Ширины превью без увеличения: меньше оригинала или сам оригинал."""
+    widths = [width for width in THUMBNAIL_WIDTHS if width < original_width]
+    return widths or [original_width]
+
+
+def generate(name, storage=default_storage):
+    """Создаёт превью изображения `name` и возвращает их ширины.
+
+    Не обращается к базе данных, поэтому может выполняться
+    в отдельном процессе.
+    """
+    with storage.open(name, 'rb') as fh:
+        image = ImageOps.exif_transpose(Image.open(fh))
+        image.load()
+    widths = target_widths(image.width)
+    for width in widths:
+        height = max(round(image.height * width / image.width), 1)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for ext, pil_format, options in THUMBNAIL_FORMATS:
+            alpha = pil_format == 'WEBP' and 'A' in image.mode
+            converted = resized.convert('RGBA' if alpha else 'RGB')
+            buffer = io.BytesIO()
+            converted.save(buffer, pil_format, **options)
+            path = thumbnail_name(name, width, ext)
+            storage.delete(path)
+            storage.save(path, ContentFile(buffer.getvalue()))
+    return widths
+
+
+def delete_thumbnails(name, widths, storage=default_storage):
+    """Удаляет превью изображения `name`, созданные `generate()`."""
+    for width in widths:
+        for ext, _, _ in THUMBNAIL_FORMATS:
+            storage.delete(thumbnail_name(name, width, ext))
+
+
+def srcsets(name, widths, storage=default_storage):
+    """srcset для <picture>: по строке на формат и `src` для <img>."""
+    result = {'sizes': SIZES}
+    for ext, _, _ in THUMBNAIL_FORMATS:
+        result[ext] = ', '.join(
+            f'{storage.url(thumbnail_name(name, width, ext))} {width}w'
+            for width in widths
+        )
+    fallback = min(widths, key=lambda width: abs(width - 640))
+    result['src'] = storage.url(thumbnail_name(name, fallback, 'jpeg'))
+    return result
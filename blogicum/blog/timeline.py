@@ -0,0 +1,214 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone as tz
+
+from .models import Follow, Post, TimelineEntry
+from .pagination import CursorPaginator
+
+CELEBRITIES_KEY = 'blog:timeline:celebrities'
+# Прошлый состав без срока жизни: по нему видно, кто перестал
+# быть «звездой», даже если основной ключ вытеснен из кэша.
+KNOWN_CELEBRITIES_KEY = 'blog:timeline:celebrities:known'
+CELEBRITIES_TIMEOUT = 60 * 10
+# Пересчёт уже поставлен в очередь.
+REFRESH_LOCK_KEY = 'blog:timeline:celebrities:refresh'
+
+# Сколько последних публикаций автора попадает в ленту при подписке.
+BACKFILL_POSTS = 50
+
+TIMELINE_ORDERING = ('-pub_date', 'id')
+
+
+def refresh_celebrities():
+    """Пересчитывает id авторов, чьи публикации не раскладываются по лентам.
+
+    У них не меньше BLOG_TIMELINE_FANOUT_LIMIT подписчиков: запись
+    в каждую ленту стоила бы слишком дорого, поэтому подписчики
+    читают их публикации сами при показе ленты. Группировка идёт
+    по всей таблице подписок, поэтому вызывается только из фоновых
+    задач.
+    """
+    ids = set(Follow.objects.values('author_id').annotate(
+        followers=Count('id')
+    ).filter(
+        followers__gte=settings.BLOG_TIMELINE_FANOUT_LIMIT
+    ).values_list('author_id', flat=True))
+    demoted = cache.get(KNOWN_CELEBRITIES_KEY, set()) - ids
+    if demoted:
+        # tasks импортирует этот модуль.
+        from .tasks import backfill_followers, enqueue
+        for author_id in demoted:
+            enqueue(backfill_followers, unique=True, author_id=author_id)
+    cache.set(CELEBRITIES_KEY, ids, CELEBRITIES_TIMEOUT)
+    cache.set(KNOWN_CELEBRITIES_KEY, ids, None)
+    cache.delete(REFRESH_LOCK_KEY)
+    return ids
+
+
+def celebrities():
+    """Список «звёзд» для фоновых задач: из кэша или пересчитанный."""
+    ids = cache.get(CELEBRITIES_KEY)
+    if ids is None:
+        ids = refresh_celebrities()
+    return ids
+
+
+def cached_celebrities():
+    """Список «звёзд» для показа ленты, без группировки подписок.
+
+    Устаревший список пересчитывает фоновая задача, а до её
+    выполнения лента читается по последнему посчитанному составу:
+    по нему же раскладывались публикации. Блокировка в кэше
+    не даёт ставить пересчёт в очередь на каждый показ.
+    """
+    ids = cache.get(CELEBRITIES_KEY)
+    if ids is None:
+        if cache.add(REFRESH_LOCK_KEY, 1, CELEBRITIES_TIMEOUT):
+            from .tasks import enqueue, update_celebrities
+            enqueue(update_celebrities)
+        ids = cache.get(KNOWN_CELEBRITIES_KEY, set())
+    return ids
+
+
+def insert_entries(author_id, post_ids, user_id=None):
+    """Добавляет публикации автора в ленты его подписчиков.
+
+    Строки выбирает один INSERT … SELECT по таблице подписок, а не
+    список, прочитанный заранее: подписка, удалённая до вставки,
+    не получит записей, а после неё их уберёт `drop()`. `user_id`
+    ограничивает вставку одним подписчиком.
+    """
+    if not post_ids:
+        return
+    conditions = [
+        'follow.author_id = %s', 'post.is_published',
+        f'post.id IN ({", ".join(["%s"] * len(post_ids))})',
+    ]
+    params = [author_id, *post_ids]
+    if user_id is not None:
+        conditions.append('follow.user_id = %s')
+        params.append(user_id)
+    ops = connection.ops
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{TimelineEntry._meta.db_table} (user_id, post_id, pub_date) '
+            f'SELECT follow.user_id, post.id, post.pub_date '
+            f'FROM {Follow._meta.db_table} follow '
+            f'INNER JOIN {Post._meta.db_table} post '
+            f'ON post.author_id = follow.author_id '
+            f'WHERE {" AND ".join(conditions)} '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            params,
+        )
+
+
+def fan_out(post_id):
+    """Раскладывает публикацию по лентам подписчиков автора и его самого.
+
+    Повторный вызов безопасен: он переносит запись при смене даты
+    и убирает её из лент, если публикацию скрыли.
+    """
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'is_published', 'pub_date').first()
+    if post is None:
+        return
+    entries = TimelineEntry.objects.filter(post_id=post_id)
+    if not post['is_published']:
+        entries.delete()
+        return
+    entries.exclude(pub_date=post['pub_date']).update(
+        pub_date=post['pub_date'])
+    TimelineEntry.objects.bulk_create([TimelineEntry(
+        user_id=post['author_id'], post_id=post_id,
+        pub_date=post['pub_date'],
+    )], ignore_conflicts=True)
+    if post['author_id'] not in celebrities():
+        insert_entries(post['author_id'], [post_id])
+
+
+def recent_posts(author_id):
+    return list(Post.objects.filter(
+        author_id=author_id, is_published=True
+    ).order_by('-pub_date').values_list('id', flat=True)[:BACKFILL_POSTS])
+
+
+def backfill(user_id, author_id):
+    """Последние публикации автора в ленте нового подписчика.
+
+    Если подписку успели отменить, пока задача ждала в очереди,
+    вставлять нечего.
+    """
+    if author_id not in celebrities():
+        insert_entries(author_id, recent_posts(author_id), user_id=user_id)
+
+
+def backfill_all_followers(author_id):
+    """Раскладывает последние публикации автора, переставшего быть
+    «звездой», по лентам всех его подписчиков."""
+    insert_entries(author_id, recent_posts(author_id))
+
+
+def drop(user_id, author_id):
+    """Убирает публикации автора из ленты отписавшегося."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорная пагинация домашней ленты по (-pub_date, id).
+
+    Разложенные публикации читаются диапазоном индекса TimelineEntry
+    и догружаются по id; публикации «звёзд», на которых подписан
+    пользователь, выбираются при чтении и сливаются с ними.
+    """
+
+    def __init__(self, queryset, per_page, user_id):
+        super().__init__(queryset, per_page, TIMELINE_ORDERING)
+        self.user_id = user_id
+
+    def fetch_entries(self, values, reverse, limit):
+        entries = CursorPaginator(
+            TimelineEntry.objects.filter(
+                user_id=self.user_id, pub_date__lte=tz.now()),
+            limit, ('-pub_date', 'post_id'),
+        )
+        posts = []
+        while len(posts) < limit:
+            batch = entries.fetch(values, reverse, limit)
+            cards = self.queryset.for_cards().in_bulk(
+                [entry.post_id for entry in batch])
+            # Публикации скрытых категорий остаются в таблице,
+            # но не показываются; их место занимают следующие.
+            posts += [cards[entry.post_id] for entry in batch
+                      if entry.post_id in cards]
+            if len(batch) < limit:
+                break
+            values = [batch[-1].pub_date, batch[-1].post_id]
+        return posts
+
+    def fetch_celebrities(self, values, reverse, limit):
+        ids = cached_celebrities()
+        if not ids:
+            return []
+        followed = Follow.objects.filter(
+            user_id=self.user_id, author_id__in=ids
+        ).values_list('author_id', flat=True)
+        return CursorPaginator(
+            self.queryset.filter(author_id__in=list(followed)).for_cards(),
+            limit, self.ordering,
+        ).fetch(values, reverse, limit)
+
+    def fetch(self, values, reverse, limit):
+        posts = {}
+        for post in (self.fetch_entries(values, reverse, limit)
+                     + self.fetch_celebrities(values, reverse, limit)):
+            posts[post.id] = post
+        items = list(posts.values())
+        # Устойчивая сортировка по полям с конца даёт порядок ordering.
+        for name in reversed(self.ordering):
+            items.sort(key=lambda post: getattr(post, name.lstrip('-')),
+                       reverse=name.startswith('-') != reverse)
+        return items[:limit]
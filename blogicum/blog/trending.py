@@ -0,0 +1,175 @@
+import math
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Q
+from django.utils import timezone as tz
+
+from .cache import purge_tags
+from .models import Post, TrendingScore, ViewCounter
+from .pagination import CursorPaginator
+
+TRENDING_ORDERING = ('-trending_score', 'id')
+WRITE_BATCH = 500
+
+# Вклад одного взаимодействия во вовлечённость публикации.
+COMMENT_WEIGHT = 3
+REACTION_WEIGHT = 2
+VIEW_WEIGHT = 0.1
+
+LAST_RUN_KEY = 'blog:trending:last_run'
+
+
+def record_view(post_id):
+    """Засчитывает просмотр публикации в случайном шарде ViewCounter.
+
+    Счётчик в базе, а не в кэше: compute_trending работает отдельным
+    процессом и должен видеть просмотры всех веб-процессов. Запись
+    идёт мимо маршрутизатора, чтобы просмотр не закреплял клиента
+    за основной базой, как запись самого пользователя.
+    """
+    shard = random.randrange(settings.BLOG_VIEW_SHARDS)
+    counters = ViewCounter.objects.using(DEFAULT_DB_ALIAS).filter(
+        post_id=post_id, shard=shard)
+    if counters.update(delta=F('delta') + 1):
+        return
+    # Пустую строку шарда мог только что создать параллельный запрос.
+    ViewCounter.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+        [ViewCounter(post_id=post_id, shard=shard)], ignore_conflicts=True)
+    counters.update(delta=F('delta') + 1)
+
+
+def take_views():
+    """Забирает накопленные просмотры: {id публикации: число}.
+
+    Как в `reactions.flush()`, из шарда вычитается только прочитанное,
+    поэтому просмотры, пришедшие во время пересчёта, не теряются.
+    Вызывается в транзакции пересчёта.
+    """
+    views = defaultdict(int)
+    rows = list(ViewCounter.objects.exclude(delta=0).values_list(
+        'pk', 'post_id', 'delta'))
+    for pk, post_id, delta in rows:
+        ViewCounter.objects.filter(pk=pk).update(delta=F('delta') - delta)
+        views[post_id] += delta
+    if rows:
+        ViewCounter.objects.filter(delta=0).delete()
+    return views
+
+
+def score(pub_date, comments, reactions, views):
+    """Рейтинг публикации, не зависящий от момента расчёта.
+
+    Логарифм вовлечённости плюс время выхода в единицах затухания:
+    публикация на BLOG_TRENDING_DECAY_HOURS новее весит как в десять
+    раз более обсуждаемая. Старые рейтинги не устаревают со временем,
+    поэтому перезаписывать нужно только строки с новой активностью.
+    """
+    engagement = (comments * COMMENT_WEIGHT + reactions * REACTION_WEIGHT
+                  + views * VIEW_WEIGHT)
+    decay = settings.BLOG_TRENDING_DECAY_HOURS * 60 * 60
+    return math.log10(max(engagement, 1)) + pub_date.timestamp() / decay
+
+
+def write_scores(posts, views, now):
+    """Записывает рейтинг пачки публикаций с новыми просмотрами `views`.
+
+    Возвращает число записанных строк.
+    """
+    ids = [post_id for post_id, *_ in posts]
+    current = {
+        post_id: (value, total)
+        for post_id, value, total in TrendingScore.objects.filter(
+            post_id__in=ids).values_list('post_id', 'score', 'views')
+    }
+    created, changed = [], []
+    for post_id, pub_date, comments, reactions in posts:
+        old = current.get(post_id)
+        total = (old[1] if old else 0) + views.get(post_id, 0)
+        value = score(pub_date, comments, reactions, total)
+        row = TrendingScore(
+            post_id=post_id, score=value, views=total, updated_at=now)
+        if old is None:
+            created.append(row)
+        elif old != (value, total):
+            changed.append(row)
+    TrendingScore.objects.bulk_create(created)
+    TrendingScore.objects.bulk_update(
+        changed, ('score', 'views', 'updated_at'))
+    return len(created) + len(changed)
+
+
+def compute(now=None):
+    """Пересчитывает рейтинг публикаций за BLOG_TRENDING_WINDOW_DAYS.
+
+    Читаются только публикации, изменившиеся с прошлого запуска
+    (новые комментарии и реакции обновляют Post.updated_at),
+    просмотренные и ещё не попавшие в рейтинг; без отметки прошлого
+    запуска пересчитывается всё окно. Просмотры забираются из
+    ViewCounter в той же транзакции, в которой пишется рейтинг;
+    просмотры публикаций вне окна отбрасываются. Вышедшие из окна
+    и скрытые публикации удаляются одним запросом. Возвращает число
+    записанных строк.
+    """
+    now = now or tz.now()
+    since = cache.get(LAST_RUN_KEY)
+    window = Post.published_posts().filter(
+        pub_date__gt=now - timedelta(days=settings.BLOG_TRENDING_WINDOW_DAYS))
+    written = 0
+    with transaction.atomic():
+        views = take_views()
+        changed = window
+        if since is not None:
+            changed = window.filter(
+                Q(updated_at__gte=since) | Q(pk__in=list(views))
+                | ~Q(pk__in=TrendingScore.objects.values('post_id'))
+            )
+        posts = list(changed.values_list(
+            'id', 'pub_date', 'comment_count', 'reaction_count'))
+        for start in range(0, len(posts), WRITE_BATCH):
+            written += write_scores(
+                posts[start:start + WRITE_BATCH], views, now)
+        deleted, _ = TrendingScore.objects.exclude(
+            post_id__in=window.values('pk')).delete()
+        written += deleted
+    cache.set(LAST_RUN_KEY, now, None)
+    if written:
+        purge_tags('trending')
+    return written
+
+
+class TrendingPaginator(CursorPaginator):
+    """Курсорная пагинация «Популярного» по (-trending_score, id).
+
+    Рейтинг читается диапазоном индекса TrendingScore, публикации
+    догружаются по id, как в TimelinePaginator.
+    """
+
+    def __init__(self, queryset, per_page):
+        super().__init__(queryset, per_page, TRENDING_ORDERING)
+
+    def to_python(self, field, value):
+        return float(value) if field == 'trending_score' else int(value)
+
+    def fetch(self, values, reverse, limit):
+        ranking = CursorPaginator(
+            TrendingScore.objects.all(), limit, ('-score', 'post_id'))
+        posts = []
+        while len(posts) < limit:
+            batch = ranking.fetch(values, reverse, limit)
+            cards = self.queryset.for_cards().in_bulk(
+                [row.post_id for row in batch])
+            for row in batch:
+                # Скрытые после пересчёта публикации пропускаются.
+                if row.post_id in cards:
+                    post = cards[row.post_id]
+                    post.trending_score = row.score
+                    posts.append(post)
+            if len(batch) < limit:
+                break
+            values = [batch[-1].score, batch[-1].post_id]
+        return posts[:limit]
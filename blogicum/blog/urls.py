@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 app_name = 'blog'
 
@@ -8,6 +8,9 @@ urlpatterns = [
     path('',
          views.IndexListView.as_view(),
          name='index'),
+    path('trending/',
+         views.TrendingListView.as_view(),
+         name='trending'),
     path('posts/create/',
          views.PostCreateView.as_view(),
          name='create_post'),
@@ -20,6 +23,12 @@ urlpatterns = [
     path('posts/<int:post_pk>/delete/',
          views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('posts/<int:post_pk>/comments/',
+         views.PostCommentsView.as_view(),
+         name='post_comments'),
+    path('posts/<int:post_pk>/react/',
+         views.ReactionView.as_view(),
+         name='react'),
     path('posts/<int:post_pk>/comment/',
          views.CommentCreateView.as_view(),
          name='add_comment'),
@@ -32,10 +41,37 @@ urlpatterns = [
     path('category/<slug:category_slug>/',
          views.CategoryPosts.as_view(),
          name='category_posts'),
+    path('search/',
+         views.SearchView.as_view(),
+         name='search'),
     path('profile/<slug:username>/',
          views.ProfileListView.as_view(),
          name='profile'),
     path('profile/<slug:username>/edit/',
          views.ProfileUpdateView.as_view(),
          name='edit_profile'),
+    path('profile/<slug:username>/follow/',
+         views.FollowView.as_view(),
+         name='follow'),
+    path('profile/<slug:username>/unfollow/',
+         views.FollowView.as_view(follow=False),
+         name='unfollow'),
+    path('timeline/',
+         views.TimelineView.as_view(),
+         name='timeline'),
+    path('notifications/',
+         views.NotificationListView.as_view(),
+         name='notifications'),
+    path('api/posts/',
+         api.FeedApiView.as_view(),
+         name='api_feed'),
+    path('api/posts/<int:post_pk>/',
+         api.PostDetailApiView.as_view(),
+         name='api_post_detail'),
+    path('api/category/<slug:category_slug>/',
+         api.CategoryApiView.as_view(),
+         name='api_category_posts'),
+    path('api/profile/<slug:username>/',
+         api.ProfileApiView.as_view(),
+         name='api_profile'),
 ]
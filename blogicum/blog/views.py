@@ -1,19 +1,33 @@
-from blog.models import Category, Comment, Post
+from blog.models import Comment, Follow, Notification, Post
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
-from django.http import Http404
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from django.utils import timezone as tz
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
-                                  UpdateView)
+                                  UpdateView, View)
 
+from .cache import forget_profile, get_profile, purge_tags
 from .forms import CommentForm, PostForm
-from .mixins import CommentDispatchMixin, PostDispatchMixin
+from .mixins import (AnonymousPageCacheMixin, CommentDispatchMixin,
+                     CursorPaginationMixin, PostDispatchMixin, PostTasksMixin,
+                     ReactedPostsMixin, ReplicaReadMixin)
+from .notifications import INBOX_ORDERING, mark_read
+from .pagination import CursorPaginator, InvalidCursor
+from .reactions import reacted_posts, reaction_count, toggle
+from .registry import categories
+from .search import SearchPaginator, get_backend, parse_terms
+from .tasks import backfill_timeline, deliver_notifications, enqueue
+from .timeline import TimelinePaginator, drop
+from .trending import TrendingPaginator, record_view
 
 User = get_user_model()
 
+COMMENTS_PER_PAGE = 20
+
 
 class CommentCreateView(LoginRequiredMixin, CreateView):
     model = Comment
@@ -27,7 +41,11 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         form.instance.author = self.request.user
         form.instance.post = self.post_object
-        return super().form_valid(form)
+        with transaction.atomic():
+            response = super().form_valid(form)
+            Post.change_comment_count(self.post_object.pk, 1)
+            enqueue(deliver_notifications, unique=True)
+        return response
 
     def get_success_url(self):
         return reverse(
@@ -35,17 +53,36 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         )
 
 
-class IndexListView(ListView):
+class IndexListView(ReplicaReadMixin, AnonymousPageCacheMixin,
+                    ReactedPostsMixin, CursorPaginationMixin, ListView):
     model = Post
     template_name = 'blog/index.html'
     paginate_by = 10
+    page_cache_tags = ('feed',)
+    cursor_ordering = ('-pub_date', 'category_id', 'title', 'id')
+
+    def get_queryset(self):
+        return self.model.published_posts().for_cards().order_by(
+            '-pub_date', 'category', 'title'
+        )
+
+
+class TrendingListView(ReplicaReadMixin, AnonymousPageCacheMixin,
+                       ReactedPostsMixin, CursorPaginationMixin, ListView):
+    """«Популярное»: публикации в порядке рейтинга из TrendingScore."""
+    model = Post
+    template_name = 'blog/trending.html'
+    paginate_by = 10
+    page_cache_tags = ('trending',)
 
     def get_queryset(self):
-        return self.model.published_posts().select_related(
-            'author'
-        ).annotate(
-            comment_count=Count('comment')
-        ).order_by('-pub_date', 'category', 'title')
+        return self.model.published_posts()
+
+    def get_cursor_pagination(self):
+        return True
+
+    def get_cursor_paginator(self, queryset, page_size):
+        return TrendingPaginator(queryset, page_size)
 
 
 class CommentUpdateView(LoginRequiredMixin, CommentDispatchMixin, UpdateView):
@@ -68,6 +105,12 @@ class CommentDeleteView(LoginRequiredMixin, CommentDispatchMixin, DeleteView):
     template_name = 'blog/comment.html'
     pk_url_kwarg = 'comment_pk'
 
+    def delete(self, request, *args, **kwargs):
+        with transaction.atomic():
+            response = super().delete(request, *args, **kwargs)
+            Post.change_comment_count(self.object.post_id, -1)
+        return response
+
     def get_success_url(self):
         return reverse(
             'blog:post_detail',
@@ -77,7 +120,7 @@ class CommentDeleteView(LoginRequiredMixin, CommentDispatchMixin, DeleteView):
         )
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(LoginRequiredMixin, PostTasksMixin, CreateView):
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
@@ -91,30 +134,110 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         return reverse('blog:profile', kwargs={'username': self.request.user})
 
 
-class PostDetailView(LoginRequiredMixin, DetailView):
+class PostDetailView(ReplicaReadMixin, LoginRequiredMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_pk'
+    with_reactions = True
+    record_views = True
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = get_object_or_404(
-            Post,
-            pk=kwargs['post_pk'])
-        if not instance.is_published or instance.pub_date > tz.now():
-            if instance.author != request.user:
+    def get_queryset(self):
+        return super().get_queryset().select_related(
+            'author', 'category', 'location'
+        )
+
+    def get(self, request, *args, **kwargs):
+        # Публикация читается здесь, а не в dispatch(): после проверки
+        # входа и внутри read_from_replica() из ReplicaReadMixin.
+        self.object = self.get_object()
+        if self.record_views and self.object.author_id != request.user.id:
+            record_view(self.object.pk)
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+    def get_object(self, queryset=None):
+        post = super().get_object(queryset)
+        if not post.is_published or post.pub_date > tz.now():
+            if post.author_id != self.request.user.id:
                 raise Http404
-        return super().dispatch(request, *args, **kwargs)
+        return post
+
+    def get_comments_page(self):
+        paginator = CursorPaginator(
+            self.object.comment.select_related('author'),
+            COMMENTS_PER_PAGE,
+            ('created_at', 'id'),
+        )
+        try:
+            return paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor as error:
+            raise Http404(str(error))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comment.select_related('author')
-        )
+        context['comments'] = self.get_comments_page()
+        if self.with_reactions:
+            context['reaction_count'] = reaction_count(self.object)
+            context['reacted_posts'] = reacted_posts(
+                self.request.user, [self.object.id])
         return context
 
 
-class PostUpdateView(LoginRequiredMixin, PostDispatchMixin, UpdateView):
+class PostCommentsView(PostDetailView):
+    """Следующие страницы комментариев: HTML-фрагмент или JSON."""
+    template_name = 'includes/comments_page.html'
+    with_reactions = False
+    record_views = False
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get('format') != 'json':
+            return super().render_to_response(context, **response_kwargs)
+        comments = context['comments']
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created_at': comment.created_at,
+                }
+                for comment in comments
+            ],
+            'next_cursor': comments.next_cursor,
+        })
+
+
+class ReactionView(LoginRequiredMixin, View):
+    """Ставит или снимает реакцию на публикацию (POST).
+
+    Возвращает пользователя на страницу из `next` или, с ?format=json,
+    отдаёт новое состояние реакции.
+    """
+
+    def get(self, request, post_pk):
+        return redirect('blog:post_detail', post_pk)
+
+    def post(self, request, post_pk):
+        post = get_object_or_404(
+            Post.objects.only('author_id', 'is_published', 'pub_date'),
+            pk=post_pk)
+        if not post.is_published or post.pub_date > tz.now():
+            if post.author_id != request.user.id:
+                raise Http404
+        reacted = toggle(request.user.id, post.pk)
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'reacted': reacted})
+        next_url = request.POST.get('next')
+        if next_url and url_has_allowed_host_and_scheme(
+                next_url, allowed_hosts={request.get_host()},
+                require_https=request.is_secure()):
+            return redirect(next_url)
+        return redirect('blog:post_detail', post.pk)
+
+
+class PostUpdateView(LoginRequiredMixin, PostDispatchMixin, PostTasksMixin,
+                     UpdateView):
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
@@ -143,66 +266,177 @@ class PostDeleteView(LoginRequiredMixin, PostDispatchMixin, DeleteView):
         return reverse('blog:profile', kwargs={'username': self.request.user})
 
 
-class CategoryPosts(ListView):
+class CategoryPosts(ReplicaReadMixin, AnonymousPageCacheMixin,
+                    ReactedPostsMixin, ListView):
     model = Post
     template_name = "blog/category.html"
     context_object_name = "posts"
     paginate_by = 10
 
+    def get(self, request, *args, **kwargs):
+        self.category = categories.get(kwargs['category_slug'])
+        if self.category is None or not self.category.is_published:
+            raise Http404
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
-        category_slug = self.kwargs.get("category_slug")
-        if not category_slug:
+        return Post.objects.in_category(
+            self.category.id
+        ).for_cards().order_by('-pub_date')
+
+    def get_page_cache_tags(self, context):
+        return [f'category:{self.category.id}',
+                *super().get_page_cache_tags(context)]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['category'] = self.category
+        return context
+
+
+class SearchView(ReactedPostsMixin, CursorPaginationMixin, ListView):
+    """Поиск по публикациям и комментариям к ним."""
+    model = Post
+    template_name = 'blog/search.html'
+    paginate_by = 10
+
+    def get(self, request, *args, **kwargs):
+        self.query = request.GET.get('q', '').strip()
+        self.terms = parse_terms(self.query)
+        self.backend = get_backend()
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        if not self.terms or self.backend is None:
             return Post.objects.none()
-        category = get_object_or_404(Category, slug=category_slug)
-        return Post.objects.filter(
-            is_published=True,
-            pub_date__lt=tz.now(),
-            category=category).annotate(
-                comment_count=Count('comment')
-        ).order_by('-pub_date')
+        return Post.published_posts()
+
+    def get_paginate_by(self, queryset):
+        if not self.terms or self.backend is None:
+            return None
+        return super().get_paginate_by(queryset)
+
+    def get_cursor_pagination(self):
+        return True
+
+    def get_cursor_paginator(self, queryset, page_size):
+        return SearchPaginator(queryset, page_size, self.terms, self.backend)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        category_slug = self.kwargs.get('category_slug')
-        if category_slug:
-            context['category'] = get_object_or_404(
-                Category,
-                slug=category_slug,
-                is_published=True
-            )
+        context['query'] = self.query
+        context['page_query'] = urlencode({'q': self.query}) + '&'
         return context
 
 
-class ProfileListView(ListView):
+class ProfileListView(ReplicaReadMixin, AnonymousPageCacheMixin,
+                      ReactedPostsMixin, ListView):
     model = Post
     template_name = 'blog/profile.html'
     paginate_by = 10
 
     def get_object(self, queryset=None):
-        username = self.kwargs.get('username')
-        data = get_object_or_404(User, username=username)
-        return data
+        profile = get_profile(self.kwargs.get('username'))
+        if profile is None:
+            raise Http404
+        return profile
+
+    def get(self, request, *args, **kwargs):
+        self.profile = self.get_object()
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        queryset = super().get_queryset().filter(
-            author=self.get_object()
-        )
-        if self.request.user.id != self.get_object().id:
-            queryset = queryset.filter(
-                is_published=True, pub_date__lt=tz.now(),
-            )
-        return queryset.order_by(
-            '-pub_date'
-        ).annotate(
-            comment_count=Count('comment')
-        )
+        return super().get_queryset().by_author(
+            self.profile['id'], self.request.user.id
+        ).for_cards().order_by('-pub_date')
+
+    def get_page_cache_tags(self, context):
+        return [f'author:{self.profile["id"]}',
+                *super().get_page_cache_tags(context)]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['profile'] = self.get_object()
-        if context['profile']:
-            return context
-        return Http404
+        context['profile'] = self.profile
+        user = self.request.user
+        if user.is_authenticated and user.id != self.profile['id']:
+            context['is_following'] = Follow.objects.filter(
+                user=user, author_id=self.profile['id']).exists()
+        return context
+
+
+class FollowView(LoginRequiredMixin, View):
+    """Подписка на автора и отписка от него (POST)."""
+    follow = True
+
+    def get(self, request, username):
+        return redirect('blog:profile', username)
+
+    def post(self, request, username):
+        author = get_object_or_404(User, username=username)
+        if author.id != request.user.id:
+            if self.follow:
+                self.add(author)
+            else:
+                self.remove(author)
+            forget_profile(author.id)
+            purge_tags(f'author:{author.id}')
+        return redirect('blog:profile', username)
+
+    def add(self, author):
+        _, created = Follow.objects.get_or_create(
+            user=self.request.user, author=author)
+        if created:
+            enqueue(backfill_timeline,
+                    user_id=self.request.user.id, author_id=author.id)
+
+    def remove(self, author):
+        with transaction.atomic():
+            Follow.objects.filter(
+                user=self.request.user, author=author).delete()
+            drop(self.request.user.id, author.id)
+
+
+class TimelineView(ReplicaReadMixin, LoginRequiredMixin, ReactedPostsMixin,
+                   CursorPaginationMixin, ListView):
+    """Домашняя лента: публикации авторов, на которых подписан
+    пользователь, и его собственные."""
+    model = Post
+    template_name = 'blog/timeline.html'
+    paginate_by = 10
+
+    def get_queryset(self):
+        return Post.published_posts()
+
+    def get_cursor_pagination(self):
+        return True
+
+    def get_cursor_paginator(self, queryset, page_size):
+        return TimelinePaginator(queryset, page_size, self.request.user.id)
+
+
+class NotificationListView(LoginRequiredMixin, CursorPaginationMixin,
+                           ListView):
+    """Входящие уведомления; показанные отмечаются прочитанными."""
+    template_name = 'blog/notifications.html'
+    paginate_by = 20
+    cursor_ordering = INBOX_ORDERING
+
+    def get_queryset(self):
+        return Notification.objects.filter(
+            recipient=self.request.user
+        ).select_related('post').only(
+            'count', 'is_read', 'updated_at', 'post', 'post__title')
+
+    def get_cursor_pagination(self):
+        return True
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        mark_read(self.request.user.id, [
+            notification.id for notification in context['page_obj']
+            if not notification.is_read
+        ])
+        return context
 
 
 class ProfileUpdateView(LoginRequiredMixin, UpdateView):
@@ -213,5 +447,10 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
     def get_object(self, queryset=None):
         return self.request.user
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        forget_profile(self.object.id)
+        return response
+
     def get_success_url(self):
         return reverse('blog:index')
@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,13 +24,30 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
+# Окружение: dev — разработка, test — автотесты и CI, prod — сервер.
+ENVIRONMENT = os.getenv('DJANGO_ENV', 'dev')
+if ENVIRONMENT not in ('dev', 'test', 'prod'):
+    raise ImproperlyConfigured(
+        f'Неизвестное окружение DJANGO_ENV={ENVIRONMENT}')
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = os.getenv('SECRET_KEY', 'key')
+if ENVIRONMENT == 'prod':
+    SECRET_KEY = os.environ['SECRET_KEY']
+else:
+    SECRET_KEY = os.getenv('SECRET_KEY', 'key')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = ['127.0.0.1']
+DEBUG = ENVIRONMENT == 'dev'
+
+# На сервере адреса задаются окружением; при разработке и в тестах
+# (DEBUG выключен) нужны локальные имена и testserver тестового клиента.
+if ENVIRONMENT == 'prod':
+    ALLOWED_HOSTS = [
+        host.strip() for host in os.environ['ALLOWED_HOSTS'].split(',')
+        if host.strip()
+    ]
+else:
+    ALLOWED_HOSTS = ['127.0.0.1', 'localhost', '[::1]', 'testserver']
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
@@ -44,20 +63,24 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django_bootstrap5',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.db.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if ENVIRONMENT == 'dev':
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES = [
@@ -71,11 +94,22 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'blog.context_processors.notifications',
             ],
         },
     },
 ]
 
+if ENVIRONMENT != 'dev':
+    # Шаблоны разбираются один раз на процесс, а не при каждой отрисовке.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 
@@ -86,9 +120,77 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение живёт между запросами, а не открывается заново
+        # на каждый; в разработке runserver перезапускается часто.
+        'CONN_MAX_AGE': int(os.getenv(
+            'DATABASE_CONN_MAX_AGE', 60 if ENVIRONMENT == 'prod' else 0)),
+        'OPTIONS': {
+            # Сколько секунд ждать снятия блокировки записи.
+            'timeout': 20,
+        },
     }
 }
 
+# Кэш общий для всех процессов: веб-воркеров, runworker и команд
+# по расписанию. Через него проходят сброс страниц по тегам, версия
+# справочника категорий, шапки профилей и ограничения частоты,
+# поэтому локальная память процесса годится только для dev и test.
+# В prod место хранения обязательно: каталог файлового кэша или,
+# с CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# (нужен пакет pymemcache), адреса серверов memcached через запятую.
+if ENVIRONMENT == 'prod':
+    CACHE_BACKEND = os.getenv(
+        'CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache')
+    CACHES = {
+        'default': {
+            'BACKEND': CACHE_BACKEND,
+            'LOCATION': os.environ['CACHE_LOCATION'],
+        },
+    }
+    if 'filebased' in CACHE_BACKEND:
+        # По умолчанию файловый кэш вычищает записи уже после 300.
+        CACHES['default']['OPTIONS'] = {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 100000)),
+        }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# PRAGMA для каждого нового соединения с SQLite (blog.db.configure_sqlite):
+# WAL позволяет читать во время записи, synchronous=NORMAL в режиме WAL
+# не теряет целостность при сбое процесса, а mmap и страничный кэш
+# уменьшают число системных вызовов при чтении.
+BLOG_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, здесь 64 МиБ.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Реплика только для чтения, например копия базы, которую
+# обновляет репликация. В тестах она подменяется основной базой.
+if os.getenv('DATABASE_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DATABASE_REPLICA'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['blog.db.ReplicaRouter']
+
+# Псевдонимы реплик, между которыми по кругу распределяются чтения
+# ленты, категорий, профилей, публикаций и статических страниц.
+BLOG_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# Сколько секунд после записи чтения клиента идут на основную базу:
+# с запасом на отставание реплик.
+BLOG_PRIMARY_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -157,3 +259,60 @@ LOGOUT_REDIRECT_URL = 'blog:index'
 LOGIN_URL = 'login'
 
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Keyset-пагинация ленты: страницы по курсору, без COUNT(*) и OFFSET.
+BLOG_CURSOR_PAGINATION = os.getenv('BLOG_CURSOR_PAGINATION') == 'True'
+
+# Время жизни закэшированной шапки профиля, секунд.
+BLOG_PROFILE_CACHE_TIMEOUT = 60 * 15
+
+# Время жизни страниц ленты, категорий и профилей, закэшированных
+# для анонимных пользователей, секунд.
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Выполнять фоновые задачи blog.tasks сразу после фиксации транзакции,
+# без очереди и команды runworker.
+BLOG_TASKS_EAGER = os.getenv('BLOG_TASKS_EAGER') == 'True'
+
+# С этого числа подписчиков публикации автора не раскладываются
+# по домашним лентам, а читаются подписчиками при показе ленты.
+BLOG_TIMELINE_FANOUT_LIMIT = 1000
+
+# На сколько строк делится накопитель реакций одной публикации.
+# Сумма переносится в Post.reaction_count командой flush_reactions.
+BLOG_REACTION_SHARDS = 8
+# То же для просмотров: их переносит в рейтинг compute_trending.
+BLOG_VIEW_SHARDS = 8
+
+# «Популярное»: публикации за последние BLOG_TRENDING_WINDOW_DAYS дней;
+# публикация на BLOG_TRENDING_DECAY_HOURS часов новее весит как
+# в десять раз более обсуждаемая. Рейтинг пересчитывает compute_trending.
+BLOG_TRENDING_WINDOW_DAYS = 7
+BLOG_TRENDING_DECAY_HOURS = 12
+
+# Ограничение частоты POST-запросов (token bucket): имя маршрута →
+# область → (ёмкость ведра, за сколько секунд оно восполняется).
+# Область 'user' — вошедший пользователь (id из сессии), 'ip' — адрес
+# клиента; запрос расходует токены, только если их хватает во всех
+# вёдрах. Сверх лимита отвечает 429 с Retry-After. Вёдра хранятся в кэше
+# BLOG_RATE_LIMIT_CACHE.
+#
+# За обратным прокси REMOTE_ADDR — адрес прокси, и все клиенты попали бы
+# в одно ведро 'ip'. Адреса своих прокси перечисляются через запятую
+# в TRUSTED_PROXIES (BLOG_TRUSTED_PROXIES): для запроса от них адресом
+# клиента считается последний адрес X-Forwarded-For, добавленный
+# не доверенным прокси. Заголовок от остальных адресов не читается:
+# его может подделать сам клиент.
+RATE_LIMITS = {
+    'blog:add_comment': {'user': (10, 60), 'ip': (30, 60)},
+    'blog:create_post': {'user': (5, 60 * 5), 'ip': (20, 60 * 5)},
+    'registration': {'ip': (5, 60 * 60)},
+}
+# Вёдра должны быть общими для всех веб-процессов, иначе каждый из них
+# пропускает свой лимит; в prod кэш 'default' общий (см. CACHES).
+BLOG_RATE_LIMIT_CACHE = 'default'
+BLOG_TRUSTED_PROXIES = [
+    address.strip()
+    for address in os.getenv('TRUSTED_PROXIES', '').split(',')
+    if address.strip()
+]
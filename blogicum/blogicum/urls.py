@@ -38,7 +38,7 @@ urlpatterns = [
         name='registration',),
 ]
 
-if settings.DEBUG:
+if 'debug_toolbar' in settings.INSTALLED_APPS:
     import debug_toolbar
 
     # Добавить к списку urlpatterns список адресов из приложения debug_toolbar:
@@ -1,3 +1,4 @@
+from blog.mixins import ReplicaReadMixin
 from django.shortcuts import render
 from django.views.generic import TemplateView
 
@@ -14,9 +15,9 @@ def server_error(request, reason=''):
     return render(request, 'pages/500.html', status=500)
 
 
-class AboutView(TemplateView):
+class AboutView(ReplicaReadMixin, TemplateView):
     template_name = 'pages/about.html'
 
 
-class RulesView(TemplateView):
+class RulesView(ReplicaReadMixin, TemplateView):
     template_name = 'pages/rules.html'
@@ -0,0 +1,117 @@
+import json
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BUDGETS_PATH = Path(__file__).resolve().parent.parent / "query_budgets.json"
+
+QueryStats = NamedTuple(
+    "QueryStats",
+    [("queries", int), ("sql_ms", float), ("total_ms", float)],
+)
+
+_recorded: Dict[str, QueryStats] = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-query-budgets",
+        action="store_true",
+        default=False,
+        help=f"Перезаписать {BUDGETS_PATH.name} измеренными значениями.",
+    )
+
+
+def load_budgets() -> dict:
+    if not BUDGETS_PATH.exists():
+        return {}
+    with open(BUDGETS_PATH, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class QueryBudget:
+    """Измеряет SQL-запросы одного запроса к странице и сверяет их
+    с бюджетом из `query_budgets.json`."""
+
+    def __init__(self, budgets: dict, update: bool):
+        self._budgets = budgets
+        self._update = update
+
+    def measure(self, name: str, client, url: str):
+        # CaptureQueriesContext округляет время запроса до миллисекунд,
+        # поэтому время SQL замеряется обёрткой вокруг execute.
+        sql_seconds = []
+
+        def timer(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                sql_seconds.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries, \
+                connection.execute_wrapper(timer):
+            response = client.get(url)
+        total_ms = (time.perf_counter() - started) * 1000
+        stats = QueryStats(
+            queries=len(queries),
+            sql_ms=sum(sql_seconds) * 1000,
+            total_ms=total_ms,
+        )
+        _recorded[name] = stats
+        if self._update:
+            return response
+
+        budget = self._budgets.get(name)
+        assert budget is not None, (
+            f"Для страницы `{name}` не задан бюджет SQL-запросов. "
+            "Запустите тесты с флагом --update-query-budgets."
+        )
+        assert stats.queries <= budget["queries"], (
+            f"Страница `{name}` ({url}) выполнила {stats.queries} "
+            f"SQL-запросов при бюджете {budget['queries']}:\n"
+            + "\n".join(q["sql"] for q in queries)
+        )
+        if "sql_ms" in budget:
+            assert stats.sql_ms <= budget["sql_ms"], (
+                f"SQL-запросы страницы `{name}` ({url}) заняли "
+                f"{stats.sql_ms:.1f} мс при бюджете {budget['sql_ms']} мс."
+            )
+        return response
+
+
+@pytest.fixture
+def query_budget(request) -> QueryBudget:
+    return QueryBudget(
+        load_budgets(),
+        update=request.config.getoption("--update-query-budgets"),
+    )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _recorded:
+        return
+    if not session.config.getoption("--update-query-budgets"):
+        return
+    budgets = load_budgets()
+    for name, stats in _recorded.items():
+        budgets.setdefault(name, {})["queries"] = stats.queries
+    with open(BUDGETS_PATH, "w", encoding="utf-8") as fh:
+        json.dump(dict(sorted(budgets.items())), fh, indent=2)
+        fh.write("\n")
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _recorded:
+        return
+    terminalreporter.section("SQL-запросы по страницам")
+    for name, stats in sorted(_recorded.items()):
+        terminalreporter.write_line(
+            f"{name:<24} {stats.queries:>3} запр. "
+            f"{stats.sql_ms:>8.1f} мс SQL {stats.total_ms:>8.1f} мс всего"
+        )
@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(**kwargs):
+        params = {
+            'author': user, 'category': published_category,
+            'is_published': True, 'location': None,
+            'pub_date': timezone.now() - timezone.timedelta(days=1),
+        }
+        params.update(kwargs)
+        return mixer.blend('blog.Post', **params)
+    return make
+
+
+@pytest.mark.django_db
+def test_api_feed_cursor_and_fields(client, make_post):
+    posts = [
+        make_post(pub_date=timezone.now() - timezone.timedelta(hours=hours))
+        for hours in range(1, 6)
+    ]
+    make_post(is_published=False)
+
+    response = client.get('/api/posts/', {'limit': 3, 'fields': 'id,title'})
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert [post['id'] for post in data['posts']] == [
+        post.id for post in posts[:3]
+    ], 'Убедитесь, что API ленты отдаёт опубликованные публикации по дате.'
+    assert set(data['posts'][0]) == {'id', 'title'}, (
+        'Убедитесь, что параметр fields ограничивает поля ответа.'
+    )
+
+    second = client.get('/api/posts/', {
+        'limit': 3, 'cursor': data['next_cursor'],
+    }).json()
+    assert [post['id'] for post in second['posts']] == [
+        post.id for post in posts[3:]
+    ], 'Убедитесь, что курсор ведёт на следующую страницу ленты.'
+    assert second['next_cursor'] is None
+    assert second['posts'][0]['category'] == posts[3].category.slug
+    assert 'text' not in second['posts'][0], (
+        'Убедитесь, что списки не отдают полный текст без запроса.'
+    )
+
+    assert client.get('/api/posts/', {'fields': 'password'}).status_code == (
+        HTTPStatus.BAD_REQUEST)
+    assert client.get('/api/posts/', {'cursor': 'x'}).status_code == (
+        HTTPStatus.BAD_REQUEST)
+
+
+@pytest.mark.django_db
+def test_api_conditional_get(client, make_post):
+    post = make_post()
+    response = client.get('/api/posts/')
+    with CaptureQueriesContext(connection) as queries:
+        not_modified = client.get(
+            '/api/posts/', HTTP_IF_NONE_MATCH=response['ETag'])
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+        'Убедитесь, что API отвечает 304 на запрос с совпадающим ETag.'
+    )
+    assert not queries, (
+        'Убедитесь, что ответ 304 анонимному клиенту не требует '
+        'запросов к базе данных.'
+    )
+
+    post.title = 'Новый заголовок'
+    post.save()
+    changed = client.get('/api/posts/', HTTP_IF_NONE_MATCH=response['ETag'])
+    assert changed.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_api_profile_and_detail_visibility(
+        client, user_client, another_user_client, user, mixer, make_post):
+    draft = make_post(is_published=False)
+    published = make_post()
+    mixer.blend('blog.Comment', post=published, text='Первый')
+
+    url = f'/api/profile/{user.username}/'
+    assert [post['id'] for post in client.get(url).json()['posts']] == [
+        published.id
+    ]
+    assert {post['id'] for post in user_client.get(url).json()['posts']} == {
+        draft.id, published.id
+    }, 'Убедитесь, что автор видит в API свои скрытые публикации.'
+
+    assert client.get(f'/api/posts/{published.id}/').status_code == (
+        HTTPStatus.UNAUTHORIZED), (
+        'Убедитесь, что публикация в API, как и на странице публикации, '
+        'доступна только после входа.'
+    )
+    assert another_user_client.get(
+        f'/api/posts/{draft.id}/').status_code == HTTPStatus.NOT_FOUND
+    assert user_client.get(f'/api/posts/{draft.id}/').status_code == (
+        HTTPStatus.OK)
+    data = another_user_client.get(f'/api/posts/{published.id}/').json()
+    assert data['post']['text'] == published.text
+    assert [comment['text'] for comment in data['comments']] == ['Первый']
+
+
+@pytest.mark.django_db
+def test_api_unpublished_category(client, mixer):
+    category = mixer.blend('blog.Category', is_published=False)
+    response = client.get(f'/api/category/{category.slug}/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
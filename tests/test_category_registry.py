@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def get_category_page(client, slug):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f'/category/{slug}/')
+    category_lookups = [
+        q for q in queries if 'FROM "blog_category"' in q['sql']
+    ]
+    return response, len(category_lookups)
+
+
+@pytest.mark.django_db
+def test_category_served_from_registry(
+        client, post_with_published_location):
+    slug = post_with_published_location.category.slug
+    get_category_page(client, slug)
+    response, lookups = get_category_page(client, slug)
+    assert response.status_code == 200
+    assert lookups == 0, (
+        'Убедитесь, что категории берутся из кэшированного справочника '
+        'и не запрашиваются из базы на каждой странице.'
+    )
+
+
+@pytest.mark.django_db
+def test_category_registry_invalidation(
+        client, post_with_published_location):
+    category = post_with_published_location.category
+    get_category_page(client, category.slug)
+
+    category.title = 'Новое название категории'
+    category.save()
+    response, _ = get_category_page(client, category.slug)
+    assert category.title in response.content.decode('utf-8'), (
+        'Убедитесь, что изменения категории сразу видны на её странице.'
+    )
+
+    category.is_published = False
+    category.save()
+    response, _ = get_category_page(client, category.slug)
+    assert response.status_code == 404, (
+        'Убедитесь, что снятая с публикации категория недоступна '
+        'сразу после сохранения.'
+    )
@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+from blog.models import Comment, Post
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_comment_count_maintained_by_views(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    for text in ('Первый', 'Второй'):
+        response = user_client.post(
+            f'/posts/{post.id}/comment/', data={'text': text}
+        )
+        assert response.status_code == HTTPStatus.FOUND
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        'Убедитесь, что при создании комментария увеличивается '
+        'счётчик комментариев публикации.'
+    )
+
+    comment = Comment.objects.filter(post=post).first()
+    response = user_client.post(
+        f'/posts/{post.id}/delete_comment/{comment.id}/delete/'
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        'Убедитесь, что при удалении комментария уменьшается '
+        'счётчик комментариев публикации.'
+    )
+
+
+@pytest.mark.django_db
+def test_post_save_keeps_comment_count(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    user_client.post(f'/posts/{post.id}/comment/', data={'text': 'Текст'})
+    post.title = 'Новый заголовок'
+    post.save()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        'Убедитесь, что сохранение публикации не перезаписывает '
+        'счётчик комментариев устаревшим значением.'
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend('blog.Comment', post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=42)
+    call_command('recount_comments', batch_size=2)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        'Убедитесь, что команда `recount_comments` восстанавливает '
+        'счётчики комментариев.'
+    )
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+from blog.views import COMMENTS_PER_PAGE
+
+N_COMMENTS = COMMENTS_PER_PAGE + 5
+
+
+@pytest.fixture
+def many_comments(mixer, post_with_published_location):
+    return mixer.cycle(N_COMMENTS).blend(
+        'blog.Comment', post=post_with_published_location
+    )
+
+
+@pytest.mark.django_db
+def test_detail_shows_first_comment_page(
+        user_client, post_with_published_location, many_comments):
+    response = user_client.get(f'/posts/{post_with_published_location.id}/')
+    comments = response.context['comments']
+    assert len(comments) == COMMENTS_PER_PAGE, (
+        'Убедитесь, что на странице публикации выводится только первая '
+        f'страница комментариев ({COMMENTS_PER_PAGE} шт.).'
+    )
+    assert [c.id for c in comments] == [c.id for c in many_comments][
+        :COMMENTS_PER_PAGE
+    ]
+    assert comments.has_next()
+    assert 'Показать ещё комментарии' in response.content.decode('utf-8')
+
+
+@pytest.mark.django_db
+def test_comment_pages_endpoint(
+        user_client, post_with_published_location, many_comments):
+    url = f'/posts/{post_with_published_location.id}/comments/'
+    first = user_client.get(url, {'format': 'json'}).json()
+    assert len(first['comments']) == COMMENTS_PER_PAGE
+    assert first['next_cursor']
+
+    second = user_client.get(
+        url, {'format': 'json', 'cursor': first['next_cursor']}
+    ).json()
+    ids = [c['id'] for c in first['comments'] + second['comments']]
+    assert ids == [c.id for c in many_comments], (
+        'Убедитесь, что страницы комментариев по курсору выводят все '
+        'комментарии в порядке создания без повторов.'
+    )
+    assert second['next_cursor'] is None
+
+    response = user_client.get(url, {'cursor': first['next_cursor']})
+    assert response.status_code == HTTPStatus.OK
+    content = response.content.decode('utf-8')
+    assert '<html' not in content, (
+        'Убедитесь, что следующая страница комментариев возвращается '
+        'HTML-фрагментом без базового шаблона.'
+    )
+    assert f'comment_{many_comments[-1].id}' in content
+
+
+@pytest.mark.django_db
+def test_comment_pages_hidden_for_unpublished_post(
+        another_user_client, post_with_published_location):
+    post_with_published_location.is_published = False
+    post_with_published_location.save()
+    response = another_user_client.get(
+        f'/posts/{post_with_published_location.id}/comments/'
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
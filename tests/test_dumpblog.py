@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from blog.models import Category, Comment, Location, Post
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+User = get_user_model()
+
+MODELS = (Comment, Post, Location, Category, User)
+
+
+def snapshot():
+    return {
+        model: list(model.objects.order_by('pk').values())
+        for model in MODELS
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('filename', ['blog.jsonl', 'blog.jsonl.gz'])
+def test_dump_and_load_round_trip(tmp_path, filename, mixer, user,
+                                  published_category, published_location):
+    posts = mixer.cycle(5).blend(
+        'blog.Post', author=user, category=published_category,
+        location=published_location, image='media/photo.jpg',
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+    mixer.cycle(3).blend('blog.Comment', post=posts[0], author=user)
+    Post.change_comment_count(posts[0].pk, 3)
+    before = snapshot()
+
+    path = str(tmp_path / filename)
+    call_command('dumpblog', path, batch_size=2)
+    for model in MODELS:
+        model.objects.all().delete()
+    call_command('loadblog', path, batch_size=2)
+
+    after = snapshot()
+    for model in MODELS:
+        assert after[model] == before[model], (
+            f'Убедитесь, что после dumpblog и loadblog записи модели '
+            f'{model.__name__} совпадают с исходными, включая '
+            'первичные ключи, даты и изображения.'
+        )
+
+
+@pytest.mark.django_db
+def test_load_sample_data():
+    call_command('loadblog', str(settings.BASE_DIR / 'db.jsonl'))
+    with open(settings.BASE_DIR / 'db.jsonl', encoding='utf-8') as fh:
+        expected = sum(
+            json.loads(line)['model'] == 'blog.post' for line in fh)
+    assert Post.objects.count() == expected
+
+
+@pytest.mark.django_db
+def test_load_purges_only_blog_pages(client):
+    cache.set('unrelated', 'value')
+    assert '<article' not in client.get('/').content.decode('utf-8')
+    call_command('loadblog', str(settings.BASE_DIR / 'db.jsonl'))
+    assert '<article' in client.get('/').content.decode('utf-8'), (
+        'Убедитесь, что loadblog сбрасывает закэшированные страницы ленты.'
+    )
+    assert cache.get('unrelated') == 'value', (
+        'Убедитесь, что loadblog не очищает кэш целиком.'
+    )
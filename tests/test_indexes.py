@@ -0,0 +1,55 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='План запроса проверяется через EXPLAIN QUERY PLAN SQLite.',
+    ),
+]
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?"?blog_post"?$')
+
+
+def get_feed_query(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    feed_queries = [
+        query['sql'] for query in queries
+        if re.search(r'FROM "blog_post"', query['sql'])
+        and 'ORDER BY' in query['sql']
+        and 'LIMIT' in query['sql']
+    ]
+    assert feed_queries, f'Не найден запрос ленты на странице {url}.'
+    return feed_queries[-1]
+
+
+def get_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.parametrize(
+    'url_template',
+    ['/', '/category/{category_slug}/', '/profile/{username}/'],
+    ids=['index', 'category', 'profile'],
+)
+def test_feed_query_uses_index(
+        url_template, user_client, user, published_category,
+        many_posts_with_published_locations):
+    url = url_template.format(
+        category_slug=published_category.slug, username=user.username
+    )
+    plan = get_plan(get_feed_query(user_client, url))
+    assert not any(FULL_SCAN.match(step) for step in plan), (
+        f'Убедитесь, что запрос ленты на странице {url} использует '
+        f'индекс, а не полный просмотр таблицы публикаций: {plan}'
+    )
+    assert any('USING INDEX' in step for step in plan), plan
@@ -0,0 +1,120 @@
+import pytest
+from blog import notifications
+from blog.models import Comment, Notification
+from blog.notifications import deliver, unread_key
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, location=None,
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+
+
+def run_tasks():
+    call_command('runworker', once=True, threads=1)
+
+
+def comment(client, post, text='Комментарий'):
+    response = client.post(f'/posts/{post.id}/comment/', {'text': text})
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+def test_comments_are_coalesced(
+        user, user_client, another_user, another_user_client, post):
+    for _ in range(3):
+        comment(another_user_client, post)
+    comment(user_client, post)
+    assert not Notification.objects.exists(), (
+        'Убедитесь, что уведомления записываются фоновой задачей, '
+        'а не при отправке комментария.'
+    )
+
+    run_tasks()
+    notification = Notification.objects.get()
+    assert notification.recipient == user and notification.count == 3, (
+        'Убедитесь, что комментарии к публикации сводятся в одно '
+        'уведомление автору, без его собственных комментариев.'
+    )
+
+    comment(another_user_client, post)
+    comment(another_user_client, post)
+    run_tasks()
+    notification.refresh_from_db()
+    assert notification.count == 5, (
+        'Убедитесь, что новые комментарии увеличивают счётчик '
+        'непрочитанного уведомления.'
+    )
+    assert deliver() == 0
+
+    content = user_client.get('/notifications/').content.decode('utf-8')
+    assert '5 новых комментариев' in content, (
+        'Убедитесь, что страница уведомлений показывает число '
+        'новых комментариев.'
+    )
+    notification.refresh_from_db()
+    assert notification.is_read
+
+    comment(another_user_client, post)
+    run_tasks()
+    assert Notification.objects.filter(is_read=False, count=1).exists(), (
+        'Убедитесь, что после прочтения создаётся новое уведомление.'
+    )
+
+
+@pytest.mark.django_db
+def test_unread_badge_uses_cached_counter(
+        user, user_client, another_user_client, post):
+    comment(another_user_client, post)
+    user_client.get('/')
+    assert cache.get(unread_key(user.id)) == 0
+
+    run_tasks()
+    assert cache.get(unread_key(user.id)) is None, (
+        'Убедитесь, что доставка сбрасывает закэшированный счётчик.'
+    )
+    content = user_client.get('/').content.decode('utf-8')
+    assert 'badge rounded-pill bg-danger">1<' in content, (
+        'Убедитесь, что в шапке выводится число непрочитанных уведомлений.'
+    )
+
+    content = user_client.get('/notifications/').content.decode('utf-8')
+    assert 'bg-danger">1<' not in content, (
+        'Убедитесь, что просмотр уведомлений сбрасывает счётчик в шапке.'
+    )
+    assert cache.get(unread_key(user.id)) == 0
+
+
+@pytest.mark.django_db
+def test_delivery_state_lives_in_database(
+        monkeypatch, user, another_user_client, post):
+    comment(another_user_client, post)
+    cache.clear()
+    assert deliver() == 1
+    assert not Comment.objects.filter(notified=False).exists()
+    cache.clear()
+    assert deliver() == 0, (
+        'Убедитесь, что очистка кэша не приводит к повторной доставке.'
+    )
+
+    comment(another_user_client, post)
+
+    def fail(comment_ids):
+        raise RuntimeError
+
+    monkeypatch.setattr(notifications, 'notify', fail)
+    with pytest.raises(RuntimeError):
+        deliver()
+    assert Comment.objects.filter(notified=False).count() == 1, (
+        'Убедитесь, что комментарии отмечаются доставленными в одной '
+        'транзакции с уведомлениями.'
+    )
+    monkeypatch.undo()
+    assert deliver() == 1
+    assert Notification.objects.get().count == 2
@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+import pytest
+from blog.cache import purge_tags
+from blog.models import Post
+from blog.views import IndexListView
+from django.db import connection
+from django.middleware.csrf import get_token
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+@pytest.fixture
+def feed_post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, location=None,
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+
+
+def get_page(client, url, **headers):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, **headers)
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+def test_anonymous_feed_cached(client, feed_post):
+    response, _ = get_page(client, '/')
+    assert response.status_code == HTTPStatus.OK
+    assert f'post:{feed_post.id}' in response['Surrogate-Key'].split()
+    assert response.has_header('ETag')
+    assert response.has_header('Last-Modified')
+
+    cached, queries = get_page(client, '/')
+    assert queries == 0, (
+        'Убедитесь, что лента для анонимных пользователей отдаётся '
+        'из кэша без запросов к базе данных.'
+    )
+    assert cached.content == response.content
+
+    not_modified, _ = get_page(
+        client, '/', HTTP_IF_NONE_MATCH=response['ETag'])
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+        'Убедитесь, что страница с совпадающим ETag отдаётся с кодом 304.'
+    )
+
+
+@pytest.mark.django_db
+def test_authenticated_feed_not_cached(user_client, feed_post):
+    response, _ = get_page(user_client, '/')
+    assert not response.has_header('Surrogate-Key')
+    _, queries = get_page(user_client, '/')
+    assert queries > 0
+
+
+@pytest.mark.django_db
+def test_page_cache_purged_by_tags(
+        client, mixer, feed_post, another_category):
+    category_url = f'/category/{feed_post.category.slug}/'
+    get_page(client, category_url)
+    get_page(client, '/')
+
+    mixer.blend('blog.Post', category=another_category, is_published=True)
+    _, queries = get_page(client, category_url)
+    assert queries == 0, (
+        'Убедитесь, что публикация в другой категории не сбрасывает '
+        'закэшированную страницу категории.'
+    )
+
+    mixer.blend('blog.Comment', post=feed_post)
+    Post.change_comment_count(feed_post.id, 1)
+    for url in ('/', category_url):
+        response, queries = get_page(client, url)
+        assert queries > 0 and 'Комментарии (1)' in response.content.decode(
+            'utf-8'), (
+            'Убедитесь, что новый комментарий сбрасывает закэшированные '
+            'страницы с этой публикацией.'
+        )
+
+
+@pytest.mark.django_db
+def test_page_with_csrf_token_not_cached(client, feed_post, monkeypatch):
+    original = IndexListView.get_context_data
+
+    def with_token(self, **kwargs):
+        get_token(self.request)
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(IndexListView, 'get_context_data', with_token)
+    response, _ = get_page(client, '/')
+    assert 'csrftoken' in response.cookies
+    response, queries = get_page(client, '/')
+    assert queries > 0 and 'csrftoken' in response.cookies, (
+        'Убедитесь, что страница с CSRF-токеном не попадает в общий кэш.'
+    )
+
+
+@pytest.mark.django_db
+def test_purge_during_render_invalidates_entry(
+        client, feed_post, monkeypatch):
+    original = IndexListView.get_context_data
+
+    def purge_while_rendering(self, **kwargs):
+        context = original(self, **kwargs)
+        purge_tags('feed')
+        return context
+
+    monkeypatch.setattr(
+        IndexListView, 'get_context_data', purge_while_rendering)
+    get_page(client, '/')
+    monkeypatch.undo()
+    _, queries = get_page(client, '/')
+    assert queries > 0, (
+        'Убедитесь, что страница, собранная во время сброса тега, '
+        'не отдаётся из кэша.'
+    )
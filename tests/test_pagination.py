@@ -0,0 +1,73 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from conftest import N_PER_PAGE
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+N_POSTS = N_PER_PAGE * 2 + 5
+
+
+@pytest.fixture
+def many_posts(mixer, user, published_category, published_location):
+    return mixer.cycle(N_POSTS).blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+        category=published_category,
+        location=published_location,
+    )
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+def test_index_cursor_pagination(user_client, many_posts):
+    seen = []
+    pages = []
+    cursor = None
+    while True:
+        url = f'/?cursor={cursor}' if cursor else '/'
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Убедитесь, что главная страница с курсорной пагинацией '
+            'загружается без ошибок.'
+        )
+        assert not any(
+            'COUNT(*)' in query['sql'].upper() for query in queries
+        ), 'Убедитесь, что курсорная пагинация не выполняет запрос COUNT(*).'
+        page_obj = response.context['page_obj']
+        pages.append(page_obj)
+        seen.extend(post.id for post in page_obj)
+        if not page_obj.has_next():
+            break
+        assert 'cursor=' in response.content.decode('utf-8'), (
+            'Убедитесь, что шаблон пагинатора выводит ссылку '
+            'на следующую страницу по курсору.'
+        )
+        cursor = page_obj.next_cursor
+
+    assert len(pages) == 3
+    assert len(seen) == len(set(seen)) == N_POSTS, (
+        'Убедитесь, что при переходе по курсорам каждая публикация '
+        'выводится ровно один раз.'
+    )
+
+    response = user_client.get(f'/?cursor={pages[-1].previous_cursor}')
+    previous_ids = [post.id for post in response.context['page_obj']]
+    assert previous_ids == [post.id for post in pages[-2]], (
+        'Убедитесь, что ссылка на предыдущую страницу возвращает '
+        'те же публикации, что были показаны на ней.'
+    )
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+def test_index_invalid_cursor(user_client):
+    response = user_client.get('/?cursor=not-a-cursor')
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что для неверного курсора возвращается ошибка 404.'
+    )
@@ -0,0 +1,53 @@
+import pytest
+from blog.cache import fragment_cache, post_card_key
+from blog.models import Post
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def get_index(client):
+    with CaptureQueriesContext(connection) as queries:
+        content = client.get('/').content.decode('utf-8')
+    return content, len(queries)
+
+
+@pytest.mark.django_db
+def test_post_cards_served_from_cache(
+        user_client, many_posts_with_published_locations):
+    get_index(user_client)
+    cache = fragment_cache()
+    for post in Post.published_posts()[:10]:
+        key = post_card_key(post.id, post.updated_at, post.comment_count)
+        assert cache.get(key) is not None, (
+            'Убедитесь, что отрисованные карточки публикаций '
+            'сохраняются в кэше.'
+        )
+
+
+@pytest.mark.django_db
+def test_post_card_cache_invalidation(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    get_index(user_client)
+
+    post.category.title = 'Новое название категории'
+    post.category.save()
+    post.location.name = 'Новое место'
+    post.location.save()
+    post.author.username = 'renamed_author'
+    post.author.save()
+    content, _ = get_index(user_client)
+    for expected in ('Новое название категории', 'Новое место',
+                     '@renamed_author'):
+        assert expected in content, (
+            'Убедитесь, что закэшированная карточка публикации '
+            'сбрасывается при изменении категории, местоположения '
+            'и автора.'
+        )
+
+    post.title = 'Новый заголовок'
+    post.save()
+    content, _ = get_index(user_client)
+    assert 'Новый заголовок' in content, (
+        'Убедитесь, что карточка обновляется после изменения публикации.'
+    )
@@ -0,0 +1,95 @@
+import pytest
+from blog.cache import profile_key
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def get_profile_page(client, username):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f'/profile/{username}/')
+    assert response.status_code == 200
+    user_lookups = [
+        q for q in queries
+        if '"auth_user"."username" =' in q['sql']
+    ]
+    return response, len(user_lookups)
+
+
+@pytest.mark.django_db
+def test_profile_resolved_once_and_cached(
+        another_user_client, user, post_with_published_location):
+    _, lookups = get_profile_page(another_user_client, user.username)
+    assert lookups == 1, (
+        'Убедитесь, что пользователь страницы профиля ищется '
+        'по имени не больше одного раза за запрос.'
+    )
+    response, lookups = get_profile_page(another_user_client, user.username)
+    assert lookups == 0, (
+        'Убедитесь, что шапка профиля берётся из кэша.'
+    )
+    assert response.context['profile']['id'] == user.id
+    cached = cache.get(profile_key(user.id))
+    assert not {'password', 'email', 'last_login'} & set(cached), (
+        'Убедитесь, что в кэш профиля не попадают пароль, почта '
+        'и время входа пользователя.'
+    )
+
+
+@pytest.mark.django_db
+def test_profile_cache_invalidation(
+        user_client, user, published_category):
+    response, _ = get_profile_page(user_client, user.username)
+    assert response.context['profile']['post_count'] == 0
+
+    user_client.post('/posts/create/', data={
+        'title': 'Заголовок',
+        'text': 'Текст',
+        'is_published': True,
+        'pub_date': '2020-01-01T00:00',
+        'category': published_category.id,
+    })
+    response, _ = get_profile_page(user_client, user.username)
+    assert response.context['profile']['post_count'] == 1, (
+        'Убедитесь, что число публикаций в шапке профиля обновляется '
+        'после создания публикации.'
+    )
+
+    user_client.post(f'/profile/{user.username}/edit/', data={
+        'username': user.username,
+        'first_name': 'Новое',
+        'last_name': 'Имя',
+        'email': 'new@example.com',
+    })
+    response, _ = get_profile_page(user_client, user.username)
+    assert 'Новое Имя' in response.content.decode('utf-8'), (
+        'Убедитесь, что шапка профиля обновляется после '
+        'редактирования профиля.'
+    )
+
+    old_username = user.username
+    user_client.post(f'/profile/{user.username}/edit/', data={
+        'username': 'renamed_user',
+        'first_name': 'Новое',
+        'last_name': 'Имя',
+        'email': 'new@example.com',
+    })
+    assert user_client.get(f'/profile/{old_username}/').status_code == 404, (
+        'Убедитесь, что после смены имени профиль не открывается '
+        'по старому имени из кэша.'
+    )
+
+
+@pytest.mark.django_db
+def test_post_save_does_not_load_author(user, published_category, mixer):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        location=None)
+    post = type(post).objects.get(pk=post.pk)
+    post.title = 'Новый заголовок'
+    with CaptureQueriesContext(connection) as queries:
+        post.save()
+    assert not any('"auth_user"' in q['sql'] for q in queries), (
+        'Убедитесь, что сохранение публикации сбрасывает кэш профиля '
+        'по author_id, не загружая автора.'
+    )
@@ -0,0 +1,46 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FEED_URLS = ['/', '/category/{category_slug}/', '/profile/{username}/']
+
+
+def count_page_queries(client, url):
+    for cache in caches.all():
+        cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url_template', FEED_URLS, ids=['index', 'category', 'profile']
+)
+def test_feed_has_no_per_post_queries(
+        url_template, mixer, user, user_client, published_category,
+        published_locations):
+    url = url_template.format(
+        category_slug=published_category.slug, username=user.username
+    )
+
+    def add_posts(n):
+        mixer.cycle(n).blend(
+            'blog.Post',
+            author=user,
+            is_published=True,
+            category=published_category,
+            location=mixer.sequence(*published_locations),
+        )
+
+    add_posts(1)
+    one_post_queries = count_page_queries(user_client, url)
+    add_posts(9)
+    page_queries = count_page_queries(user_client, url)
+    assert page_queries == one_post_queries, (
+        f'Убедитесь, что число SQL-запросов страницы {url} не зависит от '
+        'числа публикаций на ней: автор, категория и местоположение '
+        'должны загружаться вместе с публикациями.'
+    )
@@ -0,0 +1,49 @@
+from typing import List, Tuple
+
+import pytest
+from django.urls import URLPattern, reverse
+
+
+def get_routes() -> List[Tuple[str, Tuple[str, ...]]]:
+    from blog import urls as blog_urls
+    from pages import urls as pages_urls
+
+    routes = []
+    for module in (blog_urls, pages_urls):
+        for pattern in module.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            routes.append((
+                f"{module.app_name}:{pattern.name}",
+                tuple(pattern.pattern.regex.groupindex),
+            ))
+    return routes
+
+
+ROUTES = get_routes()
+
+
+@pytest.fixture
+def route_kwargs(mixer, user, post_with_published_location):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    return {
+        "post_pk": post_with_published_location.pk,
+        "comment_pk": comment.pk,
+        "category_slug": post_with_published_location.category.slug,
+        "username": user.username,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("name", "kwarg_names"), ROUTES, ids=[name for name, _ in ROUTES]
+)
+def test_query_budget(name, kwarg_names, user_client, route_kwargs,
+                      query_budget):
+    url = reverse(name, kwargs={key: route_kwargs[key] for key in kwarg_names})
+    response = query_budget.measure(name, user_client, url)
+    assert response.status_code < 400, (
+        f"Убедитесь, что страница `{name}` ({url}) загружается без ошибок."
+    )
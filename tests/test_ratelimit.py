@@ -0,0 +1,116 @@
+import pytest
+from blog.models import Comment
+from django.test import Client
+from django.utils import timezone
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, location=None,
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+
+
+@pytest.mark.django_db
+def test_comment_rate_limit_per_user(
+        settings, user, user_client, another_user_client, post,
+        django_assert_num_queries):
+    settings.RATE_LIMITS = {'blog:add_comment': {'user': (2, 60)}}
+    url = f'/posts/{post.id}/comment/'
+    assert user_client.post(url, {'text': 'Текст'}).status_code == 302
+    # Вторая сессия того же пользователя расходует то же ведро.
+    other_session = Client()
+    other_session.force_login(user)
+    assert other_session.post(url, {'text': 'Текст'}).status_code == 302
+
+    with django_assert_num_queries(1):
+        response = user_client.post(url, {'text': 'Текст'})
+    assert response.status_code == 429, (
+        'Убедитесь, что запросы сверх лимита получают ответ 429, '
+        'прочитав из базы только сессию, и что лимит считается '
+        'по пользователю, а не по сессии.'
+    )
+    assert response['Retry-After'] == '30', (
+        'Убедитесь, что ответ 429 сообщает в Retry-After, когда '
+        'появится следующий токен.'
+    )
+    assert Comment.objects.count() == 2
+
+    assert another_user_client.post(
+        url, {'text': 'Текст'}).status_code == 302, (
+        'Убедитесь, что лимит считается для каждого пользователя отдельно.'
+    )
+    assert user_client.get(f'/posts/{post.id}/').status_code == 200
+
+
+@pytest.mark.django_db
+def test_registration_rate_limit_per_ip(settings):
+    settings.RATE_LIMITS = {'registration': {'ip': (1, 60 * 60)}}
+    data = {
+        'username': 'new_user',
+        'password1': 'Tr1ckyPassw0rd',
+        'password2': 'Tr1ckyPassw0rd',
+    }
+    assert Client().post('/auth/registration/', data).status_code == 302
+    response = Client().post(
+        '/auth/registration/', dict(data, username='other_user'))
+    assert response.status_code == 429, (
+        'Убедитесь, что регистрация ограничена по IP-адресу, '
+        'а не по сессии.'
+    )
+    other_ip = Client(REMOTE_ADDR='10.0.0.2')
+    assert other_ip.post(
+        '/auth/registration/', dict(data, username='other_user')
+    ).status_code == 302
+
+
+@pytest.mark.django_db
+def test_denied_request_does_not_spend_other_buckets(
+        settings, user_client, post):
+    settings.RATE_LIMITS = {
+        'blog:add_comment': {'user': (2, 60), 'ip': (1, 60)}}
+    url = f'/posts/{post.id}/comment/'
+    assert user_client.post(url, {'text': 'Текст'}).status_code == 302
+    assert user_client.post(url, {'text': 'Текст'}).status_code == 429
+    assert user_client.post(
+        url, {'text': 'Текст'}, REMOTE_ADDR='10.0.0.2'
+    ).status_code == 302, (
+        'Убедитесь, что запрос, отклонённый по одному ведру, '
+        'не расходует токены остальных.'
+    )
+    assert user_client.post(
+        url, {'text': 'Текст'}, REMOTE_ADDR='10.0.0.3'
+    ).status_code == 429
+
+
+@pytest.mark.django_db
+def test_ip_limit_behind_trusted_proxy(settings):
+    settings.RATE_LIMITS = {'registration': {'ip': (1, 60 * 60)}}
+    settings.BLOG_TRUSTED_PROXIES = ['10.0.0.1']
+    data = {
+        'password1': 'Tr1ckyPassw0rd',
+        'password2': 'Tr1ckyPassw0rd',
+    }
+
+    def register(username, forwarded, remote_addr='10.0.0.1'):
+        client = Client(
+            REMOTE_ADDR=remote_addr, HTTP_X_FORWARDED_FOR=forwarded)
+        return client.post(
+            '/auth/registration/', dict(data, username=username)
+        ).status_code
+
+    assert register('first', '203.0.113.1') == 302
+    assert register('second', '203.0.113.2') == 302, (
+        'Убедитесь, что за доверенным прокси лимит по IP считается '
+        'по адресу клиента из X-Forwarded-For.'
+    )
+    assert register('third', '198.51.100.7, 203.0.113.1') == 429, (
+        'Убедитесь, что адрес, вписанный клиентом левее, не обходит лимит.'
+    )
+    assert register('fourth', '198.51.100.8', '203.0.113.3') == 302
+    assert register('fifth', '198.51.100.9', '203.0.113.3') == 429, (
+        'Убедитесь, что X-Forwarded-For от недоверенного адреса '
+        'не учитывается.'
+    )
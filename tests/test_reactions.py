@@ -0,0 +1,90 @@
+import pytest
+from blog.models import Post, Reaction, ReactionCounter
+from blog.reactions import flush, reaction_count, toggle
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, location=None,
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+
+
+@pytest.mark.django_db
+def test_toggle_buffers_counts_until_flush(settings, mixer, post):
+    settings.BLOG_REACTION_SHARDS = 4
+    users = mixer.cycle(6).blend('auth.User')
+    for reactor in users:
+        assert toggle(reactor.id, post.id) is True
+    assert toggle(users[0].id, post.id) is False, (
+        'Убедитесь, что повторное нажатие снимает реакцию.'
+    )
+    assert Reaction.objects.filter(post=post).count() == 5
+    assert ReactionCounter.objects.filter(post=post).count() <= 4, (
+        'Убедитесь, что приращения копятся не более чем в '
+        'BLOG_REACTION_SHARDS строках на публикацию.'
+    )
+
+    post.refresh_from_db()
+    assert post.reaction_count == 0, (
+        'Убедитесь, что реакция не изменяет строку публикации сразу.'
+    )
+    assert reaction_count(post) == 5
+
+    call_command('flush_reactions')
+    post.refresh_from_db()
+    assert post.reaction_count == 5, (
+        'Убедитесь, что flush_reactions переносит приращения '
+        'в Post.reaction_count.'
+    )
+    assert not ReactionCounter.objects.exists()
+    assert flush() == 0
+
+    post.title = 'Новый заголовок'
+    post.save()
+    assert Post.objects.get(pk=post.pk).reaction_count == 5, (
+        'Убедитесь, что сохранение публикации не затирает число реакций.'
+    )
+
+
+@pytest.mark.django_db
+def test_reaction_endpoint(user_client, client, user, post):
+    response = user_client.post(
+        f'/posts/{post.id}/react/', {'next': '/'})
+    assert response.status_code == 302 and response['Location'] == '/'
+    assert Reaction.objects.filter(user=user, post=post).exists()
+
+    response = user_client.post(f'/posts/{post.id}/react/?format=json')
+    assert response.json() == {'reacted': False}
+
+    response = client.post(f'/posts/{post.id}/react/')
+    assert response.status_code == 302
+    assert not Reaction.objects.exists(), (
+        'Убедитесь, что реакцию может поставить только '
+        'авторизованный пользователь.'
+    )
+
+    toggle(user.id, post.id)
+    flush()
+    content = user_client.get('/').content.decode('utf-8')
+    assert 'btn-danger' in content and '&#9829; 1' in content, (
+        'Убедитесь, что карточка показывает число реакций и реакцию '
+        'пользователя.'
+    )
+
+
+@pytest.mark.django_db
+def test_anonymous_cards_have_no_reaction_form(client, post):
+    content = client.get('/').content.decode('utf-8')
+    assert 'csrfmiddlewaretoken' not in content, (
+        'Убедитесь, что карточки для анонимных пользователей не содержат '
+        'формы с CSRF-токеном: такие страницы попадают в общий кэш.'
+    )
+    assert '/auth/login/?next=' in content and '&#9829; 0' in content, (
+        'Убедитесь, что анонимный пользователь видит число реакций '
+        'и ссылку на вход.'
+    )
@@ -0,0 +1,94 @@
+import pytest
+from blog import db
+from blog.db import (PIN_COOKIE, ReplicaRouter, finish_request,
+                     read_from_replica, start_request)
+from blog.models import Post
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+@override_settings(BLOG_READ_REPLICAS=['replica1', 'replica2'])
+def test_router_round_robin_and_pinning():
+    router = ReplicaRouter()
+    start_request(pinned=False)
+    try:
+        assert router.db_for_read(Post) is None, (
+            'Убедитесь, что вне представлений для чтения запросы '
+            'идут на основную базу.'
+        )
+        chosen = []
+        for _ in range(2):
+            with read_from_replica():
+                chosen.append(router.db_for_read(Post))
+                assert router.db_for_read(Post) == chosen[-1]
+        assert sorted(chosen) == ['replica1', 'replica2'], (
+            'Убедитесь, что реплики выбираются по кругу.'
+        )
+        with read_from_replica():
+            router.db_for_write(Post)
+            assert router.db_for_read(Post) == 'default', (
+                'Убедитесь, что после записи чтения идут на основную базу.'
+            )
+    finally:
+        finish_request()
+
+    start_request(pinned=True)
+    try:
+        with read_from_replica():
+            assert router.db_for_read(Post) == 'default', (
+                'Убедитесь, что закреплённый клиент читает основную базу.'
+            )
+    finally:
+        finish_request()
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_READ_REPLICAS=['replica'])
+def test_write_pins_client_to_primary(user_client, published_category):
+    response = user_client.post('/posts/create/', {
+        'title': 'Заголовок', 'text': 'Текст',
+        'pub_date': '2020-01-01 00:00', 'category': published_category.id,
+    })
+    assert response.status_code == 302
+    assert PIN_COOKIE in response.cookies, (
+        'Убедитесь, что после записи клиент получает cookie, '
+        'закрепляющую его чтения за основной базой.'
+    )
+    # Страница после перенаправления читается с основной базы:
+    # реплики `replica` в DATABASES нет.
+    assert user_client.get(response['Location']).status_code == 200
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_READ_REPLICAS=['default'])
+def test_post_detail_read_on_replica_after_login_check(
+        monkeypatch, mixer, user, another_user_client, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, location=None,
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = Client().get(f'/posts/{post.id}/')
+    assert response.status_code == 302
+    assert not any('"blog_post"' in q['sql'] for q in queries), (
+        'Убедитесь, что анонимный посетитель перенаправляется на вход '
+        'до чтения публикации.'
+    )
+
+    post_reads = []
+    db_for_read = ReplicaRouter.db_for_read
+
+    def spy(router, model, **hints):
+        if model is Post:
+            post_reads.append(getattr(db._state, 'replica', None))
+        return db_for_read(router, model, **hints)
+
+    monkeypatch.setattr(ReplicaRouter, 'db_for_read', spy)
+    assert another_user_client.get(f'/posts/{post.id}/').status_code == 200
+    assert post_reads and set(post_reads) == {'default'}, (
+        'Убедитесь, что страница публикации читает её внутри '
+        'read_from_replica(), а не до него.'
+    )
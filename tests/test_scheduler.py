@@ -0,0 +1,55 @@
+import pytest
+from blog.models import Post
+from blog.scheduler import cache_timeout
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, location=None,
+        pub_date=timezone.now() + timezone.timedelta(seconds=30),
+    )
+
+
+@pytest.mark.django_db
+def test_cache_timeout_stops_at_next_publication(scheduled_post):
+    assert 0 < cache_timeout(300) <= 30, (
+        'Убедитесь, что кэш не переживает выход ближайшей '
+        'отложенной публикации.'
+    )
+    scheduled_post.delete()
+    assert cache_timeout(300) == 300
+
+
+@pytest.mark.django_db
+def test_publish_scheduled_purges_pages(client, scheduled_post):
+    client.get('/')
+    # Время выхода наступает без сохранения модели и без сигналов.
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timezone.timedelta(seconds=1)
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/')
+    assert len(queries) == 0
+    assert scheduled_post.title not in response.content.decode('utf-8')
+
+    call_command('publish_scheduled')
+    response = client.get('/')
+    assert scheduled_post.title in response.content.decode('utf-8'), (
+        'Убедитесь, что команда publish_scheduled сбрасывает кэш страниц, '
+        'на которых должна появиться вышедшая публикация.'
+    )
+
+
+@pytest.mark.django_db
+def test_publish_scheduled_requires_shared_cache(monkeypatch):
+    # Вне тестов mail.outbox нет.
+    monkeypatch.delattr(mail, 'outbox')
+    with pytest.raises(CommandError, match='общий кэш'):
+        call_command('publish_scheduled')
@@ -0,0 +1,94 @@
+import pytest
+from django.utils import timezone
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(title, text, **kwargs):
+        params = {
+            'author': user, 'category': published_category,
+            'is_published': True,
+            'pub_date': timezone.now() - timezone.timedelta(days=1),
+            'location': None,
+        }
+        params.update(kwargs)
+        return mixer.blend('blog.Post', title=title, text=text, **params)
+    return make
+
+
+def search(client, query, **params):
+    response = client.get('/search/', {'q': query, **params})
+    assert response.status_code == 200
+    return response, [post.id for post in response.context['object_list']]
+
+
+@pytest.mark.django_db
+def test_search_posts_and_comments(client, mixer, make_post):
+    in_title = make_post('Прогулка по набережной', 'Вечер')
+    in_text = make_post('Заметка', 'Долгая прогулка вдоль реки')
+    in_comment = make_post('Другое', 'Ничего общего')
+    mixer.blend('blog.Comment', post=in_comment, text='Хорошая прогулка!')
+    make_post('Скрытая прогулка', 'Текст', is_published=False)
+    make_post('Будущая прогулка', 'Текст',
+              pub_date=timezone.now() + timezone.timedelta(days=1))
+
+    _, found = search(client, 'прогулка')
+    assert found[0] == in_title.id, (
+        'Убедитесь, что совпадение в заголовке ранжируется выше '
+        'совпадения в тексте.'
+    )
+    assert set(found) == {in_title.id, in_text.id, in_comment.id}, (
+        'Убедитесь, что поиск находит публикации по заголовку, тексту '
+        'и комментариям и не показывает скрытые публикации.'
+    )
+
+
+@pytest.mark.django_db
+def test_search_snippet_and_index_updates(client, make_post):
+    post = make_post('Заметка', 'Старый текст <b>про</b> кошек')
+    response, found = search(client, 'кошек')
+    assert found == [post.id]
+    content = response.content.decode('utf-8')
+    assert '<mark>кошек</mark>' in content, (
+        'Убедитесь, что совпадения во фрагменте выделяются.'
+    )
+    assert '&lt;b&gt;про&lt;/b&gt;' in content, (
+        'Убедитесь, что текст фрагмента экранируется.'
+    )
+
+    post.text = 'Новый текст про собак'
+    post.save()
+    assert search(client, 'кошек')[1] == []
+    assert search(client, 'собак')[1] == [post.id], (
+        'Убедитесь, что поисковый индекс обновляется '
+        'при изменении публикации.'
+    )
+
+
+@pytest.mark.django_db
+def test_search_cursor_pages(client, make_post):
+    posts = [make_post(f'Облако {i}', 'Текст') for i in range(13)]
+    response, first = search(client, 'облако')
+    page = response.context['page_obj']
+    assert len(first) == 10 and page.has_next()
+    _, second = search(client, 'облако', cursor=page.next_cursor)
+    assert sorted(first + second) == sorted(post.id for post in posts), (
+        'Убедитесь, что результаты поиска разбиты на страницы '
+        'без пропусков и повторов.'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ['"', 'AND (', 'title:*', '', 'NEAR('])
+def test_search_ignores_query_syntax(client, query):
+    assert search(client, query)[1] == []
+
+
+@pytest.mark.django_db
+def test_admin_post_search(admin_client, make_post):
+    post = make_post('Заметка', 'Рецепт пирога')
+    make_post('Другая заметка', 'Без рецептов')
+    response = admin_client.get('/admin/blog/post/', {'q': 'пирога'})
+    assert list(response.context['cl'].queryset) == [post], (
+        'Убедитесь, что поиск в админке ищет по тексту публикаций.'
+    )
@@ -0,0 +1,34 @@
+import json
+from io import StringIO
+
+import pytest
+from blog.models import Comment, Post
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_seed_blog_and_benchmark_feed():
+    call_command(
+        'seed_blog', users=5, categories=2, locations=2, posts=20,
+        comments=50, seed=1, stdout=StringIO(),
+    )
+    assert get_user_model().objects.count() == 5
+    assert Post.objects.count() == 20
+    assert Comment.objects.count() == 50, (
+        'Убедитесь, что seed_blog создаёт заданное число объектов.'
+    )
+    assert sum(Post.objects.values_list('comment_count', flat=True)) == 50, (
+        'Убедитесь, что seed_blog пересчитывает счётчики комментариев.'
+    )
+
+    out = StringIO()
+    call_command('benchmark_feed', requests=2, warmup=0, stdout=out)
+    report = json.loads(out.getvalue())
+    assert set(report['views']) == {
+        'index', 'category_posts', 'profile', 'post_detail'}
+    for view in report['views'].values():
+        assert view['p50_ms'] > 0 and view['queries_per_request'] > 0, (
+            'Убедитесь, что benchmark_feed выводит задержку и число '
+            'запросов для каждой страницы.'
+        )
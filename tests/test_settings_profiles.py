@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.db import connection
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'blogicum'
+
+
+def load_settings(**env):
+    script = (
+        'import json; from blogicum import settings as s; '
+        'print(json.dumps({'
+        '"debug": s.DEBUG, "apps": s.INSTALLED_APPS, '
+        '"middleware": s.MIDDLEWARE, "allowed_hosts": s.ALLOWED_HOSTS, '
+        '"caches": s.CACHES, '
+        '"conn_max_age": s.DATABASES["default"]["CONN_MAX_AGE"], '
+        '"loaders": s.TEMPLATES[0]["OPTIONS"].get("loaders")}))'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=PROJECT_DIR, check=True,
+        capture_output=True, text=True, env={**os.environ, **env},
+    )
+    return json.loads(result.stdout)
+
+
+def test_prod_profile():
+    prod = load_settings(
+        DJANGO_ENV='prod', SECRET_KEY='secret',
+        ALLOWED_HOSTS='blogicum.ru, www.blogicum.ru',
+        CACHE_LOCATION='/var/cache/blogicum')
+    assert prod['debug'] is False
+    assert prod['allowed_hosts'] == ['blogicum.ru', 'www.blogicum.ru'], (
+        'Убедитесь, что в окружении prod ALLOWED_HOSTS читается '
+        'из переменной окружения.'
+    )
+    assert 'debug_toolbar' not in prod['apps'], (
+        'Убедитесь, что в окружении prod debug_toolbar не подключается.'
+    )
+    assert not any('debug_toolbar' in name for name in prod['middleware'])
+    assert prod['conn_max_age'] > 0, (
+        'Убедитесь, что в окружении prod соединения с базой '
+        'переиспользуются между запросами.'
+    )
+    assert prod['loaders'][0][0] == 'django.template.loaders.cached.Loader'
+    assert prod['caches']['default'] == {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/cache/blogicum',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }, (
+        'Убедитесь, что в окружении prod кэш общий для всех процессов '
+        'и его место хранения задаётся окружением.'
+    )
+
+    dev = load_settings(DJANGO_ENV='dev')
+    assert dev['debug'] is True
+    assert 'debug_toolbar' in dev['apps']
+
+    test = load_settings(DJANGO_ENV='test', ALLOWED_HOSTS='blogicum.ru')
+    assert {'localhost', 'testserver'} <= set(test['allowed_hosts']), (
+        'Убедитесь, что вне prod ALLOWED_HOSTS не берётся из окружения '
+        'и разрешает локальные адреса и тестовый клиент.'
+    )
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_applied():
+    if connection.vendor != 'sqlite':
+        pytest.skip('PRAGMA задаются только для SQLite.')
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous = cursor.fetchone()[0]
+        cursor.execute('PRAGMA cache_size')
+        cache_size = cursor.fetchone()[0]
+    assert synchronous == 1, (
+        'Убедитесь, что соединения с SQLite используют synchronous=NORMAL.'
+    )
+    assert cache_size == -64 * 1024
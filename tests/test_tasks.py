@@ -0,0 +1,113 @@
+import pytest
+from blog import tasks
+from blog.models import Task
+from django.core.management import call_command
+from django.utils import timezone
+
+calls = []
+
+
+@tasks.task('tests.flaky', max_attempts=2)
+def flaky(fail):
+    calls.append(fail)
+    if fail:
+        raise ValueError('сбой')
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+def test_task_runs_and_is_removed():
+    tasks.enqueue(flaky, fail=False)
+    call_command('runworker', once=True, threads=1)
+    assert calls == [False]
+    assert not Task.objects.exists(), (
+        'Убедитесь, что выполненная задача удаляется из очереди.'
+    )
+
+
+@pytest.mark.django_db
+def test_task_retried_then_failed():
+    row = tasks.enqueue(flaky, fail=True)
+    call_command('runworker', once=True, threads=1)
+    row.refresh_from_db()
+    assert row.status == Task.PENDING and row.attempts == 1
+    assert row.run_after > timezone.now(), (
+        'Убедитесь, что повтор задачи откладывается.'
+    )
+    assert 'ValueError' in row.last_error
+
+    Task.objects.update(run_after=timezone.now())
+    call_command('runworker', once=True, threads=1)
+    row.refresh_from_db()
+    assert row.status == Task.FAILED and row.attempts == 2, (
+        'Убедитесь, что после исчерпания попыток задача помечается '
+        'ошибкой.'
+    )
+    assert calls == [True, True]
+
+
+@pytest.mark.django_db
+def test_abandoned_task_reclaimed_after_visibility_timeout():
+    tasks.enqueue(flaky, fail=False)
+    assert len(tasks.claim(1, visibility_timeout=60)) == 1
+    assert tasks.claim(1, visibility_timeout=60) == [], (
+        'Убедитесь, что захваченная задача не выдаётся повторно '
+        'до истечения видимости.'
+    )
+    Task.objects.update(locked_until=timezone.now())
+    call_command('runworker', once=True, threads=1)
+    assert calls == [False]
+    assert not Task.objects.exists()
+
+
+@pytest.mark.django_db
+def test_unique_and_eager_enqueue(settings, django_capture_on_commit_callbacks):
+    tasks.enqueue(tasks.merge_search_index, unique=True)
+    tasks.enqueue(tasks.merge_search_index, unique=True)
+    assert Task.objects.count() == 1
+    call_command('runworker', once=True, threads=1)
+    assert not Task.objects.exists()
+
+    settings.BLOG_TASKS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.enqueue(flaky, fail=False)
+    assert calls == [False]
+    assert not Task.objects.exists(), (
+        'Убедитесь, что при BLOG_TASKS_EAGER задача выполняется '
+        'без очереди.'
+    )
+
+
+@pytest.mark.django_db
+def test_stale_worker_does_not_touch_reclaimed_task():
+    tasks.enqueue(flaky, fail=False)
+    [stale] = tasks.claim(1, visibility_timeout=60)
+    Task.objects.update(locked_until=timezone.now())
+    [fresh] = tasks.claim(1, visibility_timeout=60)
+
+    assert tasks.execute(stale)
+    assert Task.objects.filter(pk=fresh.pk, status=Task.RUNNING).exists(), (
+        'Убедитесь, что обработчик, у которого истекла видимость, '
+        'не удаляет задачу, захваченную заново.'
+    )
+    assert tasks.execute(fresh)
+    assert not Task.objects.exists()
+
+
+@pytest.mark.django_db
+def test_retry_yields_to_pending_duplicate():
+    tasks.enqueue(flaky, unique=True, fail=True)
+    [running] = tasks.claim(1, visibility_timeout=60)
+    duplicate = tasks.enqueue(flaky, unique=True, fail=True)
+    assert duplicate is not None, (
+        'Убедитесь, что уникальность проверяется только среди '
+        'ожидающих задач.'
+    )
+    assert tasks.enqueue(flaky, unique=True, fail=True) is None
+
+    assert not tasks.execute(running)
+    assert list(Task.objects.values_list('pk', flat=True)) == [duplicate.pk]
@@ -0,0 +1,117 @@
+import io
+
+import pytest
+from blog.models import Post
+from blog.thumbnails import thumbnail_name
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+
+def make_image(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'JPEG')
+    return SimpleUploadedFile(
+        'photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+def create_post(client, category, image):
+    client.post('/posts/create/', data={
+        'title': 'С фото',
+        'text': 'Текст',
+        'pub_date': '2020-01-01T00:00',
+        'category': category.id,
+        'image': image,
+    })
+    return Post.objects.get(title='С фото')
+
+
+@pytest.mark.django_db
+def test_thumbnails_created_by_worker(user_client, published_category):
+    post = create_post(user_client, published_category,
+                       make_image(900, 600))
+    assert post.thumbnail_data == {}
+    call_command('runworker', once=True, threads=1)
+    post.refresh_from_db()
+    assert post.thumbnail_data == {
+        'source': post.image.name, 'widths': [320, 640],
+    }, (
+        'Убедитесь, что после создания публикации в очередь ставится '
+        'создание превью изображения меньше оригинала.'
+    )
+    for width in (320, 640):
+        for ext in ('webp', 'jpeg'):
+            name = thumbnail_name(post.image.name, width, ext)
+            assert default_storage.exists(name)
+            with default_storage.open(name) as fh:
+                assert Image.open(fh).width == width
+    srcset = post.thumbnails
+    assert srcset['webp'].endswith('-640w.webp 640w')
+    assert srcset['src'].endswith('-640w.jpeg')
+
+
+@pytest.mark.django_db
+def test_post_card_uses_srcset(user_client, user, published_category):
+    post = create_post(user_client, published_category,
+                       make_image(400, 300))
+    call_command('runworker', once=True, threads=1)
+    response = user_client.get(f'/profile/{user.username}/')
+    content = response.content.decode('utf-8')
+    assert 'srcset="' in content and '-320w.webp 320w' in content, (
+        'Убедитесь, что карточка публикации выводит превью через srcset.'
+    )
+    assert post.image.url in content
+
+
+@pytest.mark.django_db
+def test_generate_thumbnails_backfill(mixer, user, published_category):
+    post = mixer.blend('blog.Post', author=user, category=published_category,
+                       image=make_image(200, 100))
+    assert Post.objects.get(pk=post.pk).thumbnail_data == {}
+    call_command('generate_thumbnails', workers=1)
+    assert Post.objects.get(pk=post.pk).thumbnail_data == {
+        'source': post.image.name, 'widths': [200],
+    }, (
+        'Убедитесь, что команда generate_thumbnails создаёт превью '
+        'для существующих изображений.'
+    )
+
+
+def test_thumbnails_keep_source_extension():
+    assert (thumbnail_name('posts/photo.jpg', 320, 'webp')
+            != thumbnail_name('posts/photo.png', 320, 'webp')), (
+        'Убедитесь, что превью изображений с одинаковым именем, но разным '
+        'расширением не перезаписывают друг друга.'
+    )
+
+
+@pytest.mark.django_db
+def test_stale_thumbnails_deleted(user_client, published_category):
+    post = create_post(user_client, published_category,
+                       make_image(400, 300))
+    call_command('runworker', once=True, threads=1)
+    post.refresh_from_db()
+    old = thumbnail_name(post.image.name, 320, 'webp')
+    assert default_storage.exists(old)
+
+    user_client.post(f'/posts/{post.id}/edit/', data={
+        'title': 'С фото',
+        'text': 'Текст',
+        'pub_date': '2020-01-01T00:00',
+        'category': published_category.id,
+        'image': make_image(500, 300),
+    })
+    call_command('runworker', once=True, threads=1)
+    post.refresh_from_db()
+    assert not default_storage.exists(old), (
+        'Убедитесь, что превью заменённого изображения удаляются.'
+    )
+    new = thumbnail_name(post.image.name, 320, 'webp')
+    assert default_storage.exists(new)
+
+    user_client.post(f'/posts/{post.id}/delete/')
+    call_command('runworker', once=True, threads=1)
+    assert not default_storage.exists(new), (
+        'Убедитесь, что превью удаляются вместе с публикацией.'
+    )
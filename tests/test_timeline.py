@@ -0,0 +1,131 @@
+import pytest
+from blog.models import Follow, TimelineEntry
+from blog.timeline import CELEBRITIES_KEY
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.fixture
+def make_post(mixer, published_category):
+    def make(author, hours_ago=1, **kwargs):
+        params = {
+            'author': author, 'category': published_category,
+            'is_published': True, 'location': None,
+            'pub_date': timezone.now() - timezone.timedelta(hours=hours_ago),
+        }
+        params.update(kwargs)
+        return mixer.blend('blog.Post', **params)
+    return make
+
+
+def run_tasks():
+    call_command('runworker', once=True, threads=1)
+
+
+def timeline(client, **params):
+    response = client.get('/timeline/', params)
+    assert response.status_code == 200
+    return [post.id for post in response.context['page_obj']]
+
+
+@pytest.mark.django_db
+def test_follow_fan_out_and_unfollow(
+        user, user_client, another_user, mixer, make_post):
+    old_post = make_post(another_user, hours_ago=5)
+    stranger_post = make_post(mixer.blend('auth.User'))
+    run_tasks()
+
+    response = user_client.post(f'/profile/{another_user.username}/follow/')
+    assert response.status_code == 302
+    assert Follow.objects.filter(user=user, author=another_user).exists()
+    run_tasks()
+    assert timeline(user_client) == [old_post.id], (
+        'Убедитесь, что после подписки в ленте появляются последние '
+        'публикации автора.'
+    )
+
+    new_post = make_post(another_user, hours_ago=1)
+    own_post = make_post(user, hours_ago=2)
+    run_tasks()
+    assert TimelineEntry.objects.filter(user=user).count() == 3
+    assert timeline(user_client) == [new_post.id, own_post.id, old_post.id], (
+        'Убедитесь, что новые публикации раскладываются по лентам '
+        'подписчиков и лента упорядочена по дате.'
+    )
+    assert stranger_post.id not in timeline(user_client)
+
+    new_post.is_published = False
+    new_post.save()
+    run_tasks()
+    assert timeline(user_client) == [own_post.id, old_post.id], (
+        'Убедитесь, что скрытая публикация пропадает из лент.'
+    )
+
+    user_client.post(f'/profile/{another_user.username}/unfollow/')
+    assert timeline(user_client) == [own_post.id], (
+        'Убедитесь, что после отписки публикации автора пропадают из ленты.'
+    )
+
+
+@pytest.mark.django_db
+def test_celebrity_posts_read_on_demand(
+        settings, django_assert_max_num_queries, user, user_client, another_user, mixer, make_post):
+    settings.BLOG_TIMELINE_FANOUT_LIMIT = 2
+    celebrity = mixer.blend('auth.User')
+    for follower in (user, another_user):
+        Follow.objects.create(user=follower, author=celebrity)
+    Follow.objects.create(user=user, author=another_user)
+
+    posts = [
+        make_post(celebrity, hours_ago=1),
+        make_post(another_user, hours_ago=2),
+        make_post(celebrity, hours_ago=3),
+    ]
+    run_tasks()
+    assert not TimelineEntry.objects.filter(
+        user=user, post__author=celebrity).exists(), (
+        'Убедитесь, что публикации авторов с большим числом подписчиков '
+        'не раскладываются по лентам.'
+    )
+
+    assert timeline(user_client) == [post.id for post in posts], (
+        'Убедитесь, что публикации таких авторов читаются при показе '
+        'ленты и сливаются с разложенными по дате.'
+    )
+
+    settings.BLOG_TIMELINE_FANOUT_LIMIT = 3
+    cache.delete(CELEBRITIES_KEY)
+    with django_assert_max_num_queries(20) as context:
+        assert timeline(user_client) == [post.id for post in posts], (
+            'Убедитесь, что до пересчёта лента читается по прошлому '
+            'списку авторов.'
+        )
+    assert not any(
+        'GROUP BY' in query['sql'] for query in context.captured_queries
+    ), 'Убедитесь, что список авторов не пересчитывается при показе ленты.'
+    run_tasks()
+    assert cache.get(CELEBRITIES_KEY) == set()
+    assert TimelineEntry.objects.filter(
+        post__author=celebrity, user__in=(user, another_user)
+    ).count() == 4, (
+        'Убедитесь, что публикации автора, у которого стало меньше '
+        'подписчиков, раскладываются по лентам всех подписчиков.'
+    )
+    assert timeline(user_client) == [post.id for post in posts]
+
+
+@pytest.mark.django_db
+def test_unfollow_before_tasks_leaves_no_entries(
+        user, user_client, another_user, make_post):
+    make_post(another_user, hours_ago=5)
+    run_tasks()
+    user_client.post(f'/profile/{another_user.username}/follow/')
+    make_post(another_user, hours_ago=1)
+    user_client.post(f'/profile/{another_user.username}/unfollow/')
+
+    run_tasks()
+    assert not TimelineEntry.objects.filter(user=user).exists(), (
+        'Убедитесь, что задачи ленты, выполненные после отписки, '
+        'не возвращают публикации автора в ленту отписавшегося.'
+    )
@@ -0,0 +1,142 @@
+import pytest
+from blog import trending as trending_module
+from blog.models import Post, TrendingScore, ViewCounter
+from blog.trending import compute
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(hours_ago, comment_count=0, **kwargs):
+        return mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            is_published=True, location=None, comment_count=comment_count,
+            pub_date=timezone.now() - timezone.timedelta(hours=hours_ago),
+            **kwargs,
+        )
+    return make
+
+
+def trending(client, **params):
+    response = client.get('/trending/', params)
+    assert response.status_code == 200
+    return [post.id for post in response.context['page_obj']]
+
+
+@pytest.mark.django_db
+def test_trending_ranks_by_decayed_engagement(
+        client, another_user_client, make_post):
+    quiet = make_post(hours_ago=1)
+    discussed = make_post(hours_ago=6, comment_count=20)
+    stale = make_post(hours_ago=24 * 30, comment_count=1000)
+    assert trending(client) == []
+
+    call_command('compute_trending')
+    assert trending(client) == [discussed.id, quiet.id], (
+        'Убедитесь, что «Популярное» упорядочено по рейтингу с учётом '
+        'давности и не содержит публикаций старше окна.'
+    )
+    assert not TrendingScore.objects.filter(post=stale).exists()
+    assert compute() == 0, (
+        'Убедитесь, что пересчёт без новой активности ничего не пишет.'
+    )
+
+    for _ in range(300):
+        another_user_client.get(f'/posts/{quiet.id}/')
+    assert compute() == 1
+    assert TrendingScore.objects.get(post=quiet).views == 300, (
+        'Убедитесь, что просмотры переносятся в рейтинг при пересчёте.'
+    )
+    assert compute() == 0
+    assert trending(client) == [quiet.id, discussed.id], (
+        'Убедитесь, что после пересчёта страница показывает новый порядок.'
+    )
+
+
+@pytest.mark.django_db
+def test_views_survive_separate_process_cache(
+        settings, another_user_client, make_post):
+    post = make_post(hours_ago=1)
+    assert compute() == 1
+    for _ in range(5):
+        another_user_client.get(f'/posts/{post.id}/')
+    # compute_trending работает отдельным процессом со своим кэшем.
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'compute-trending',
+    }}
+    assert compute() == 1
+    assert TrendingScore.objects.get(post=post).views == 5, (
+        'Убедитесь, что просмотры хранятся не в кэше веб-процесса.'
+    )
+    assert not ViewCounter.objects.exclude(delta=0).exists()
+    assert compute() == 0
+
+
+@pytest.mark.django_db
+def test_trending_page_reads_ranking_table(user_client, make_post):
+    posts = [make_post(hours_ago=hours) for hours in range(1, 26)]
+    compute()
+    seen, cursor = [], None
+    while True:
+        params = {'cursor': cursor} if cursor else {}
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get('/trending/', params)
+        assert not any(
+            'FROM "blog_post"' in query['sql']
+            and 'ORDER BY' in query['sql'] for query in queries
+        ), (
+            'Убедитесь, что порядок «Популярного» читается из таблицы '
+            'рейтинга, а не сортировкой публикаций при запросе.'
+        )
+        page_obj = response.context['page_obj']
+        seen += [post.id for post in page_obj]
+        if not page_obj.has_next():
+            break
+        cursor = page_obj.next_cursor
+    assert seen == [post.id for post in posts], (
+        'Убедитесь, что курсорная пагинация «Популярного» проходит '
+        'все публикации по одному разу.'
+    )
+
+
+@pytest.mark.django_db
+def test_compute_reads_only_changed_posts(
+        monkeypatch, user_client, make_post):
+    posts = [make_post(hours_ago=hours) for hours in range(1, 6)]
+    assert compute() == len(posts)
+
+    scored = []
+    score = trending_module.score
+
+    def spy(*args):
+        scored.append(args)
+        return score(*args)
+
+    monkeypatch.setattr(trending_module, 'score', spy)
+    assert compute() == 0 and not scored, (
+        'Убедитесь, что пересчёт без новой активности не читает '
+        'публикации окна.'
+    )
+
+    user_client.post(f'/posts/{posts[0].id}/comment/', {'text': 'Текст'})
+    assert compute() == 1
+    assert len(scored) == 1, (
+        'Убедитесь, что пересчитываются только публикации, '
+        'изменившиеся с прошлого запуска.'
+    )
+
+    Post.objects.filter(pk__in=[posts[1].id, posts[2].id]).update(
+        pub_date=timezone.now() - timezone.timedelta(days=30))
+    with CaptureQueriesContext(connection) as queries:
+        assert compute() == 2
+    deletes = [q for q in queries if q['sql'].startswith('DELETE')]
+    assert len(deletes) == 1, (
+        'Убедитесь, что вышедшие из окна строки рейтинга удаляются '
+        'одним запросом.'
+    )
+    assert not TrendingScore.objects.filter(
+        post_id__in=[posts[1].id, posts[2].id]).exists()